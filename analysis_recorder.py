@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+ANALYSIS RECORDER
+Keeps every tick's analysis for post-trade review
+
+Features:
+- In-memory buffer on the hot path (a tuple append per tick)
+- Batched flushes to an append-only binary array log (fixed-width numpy records)
+- Zone names and pattern types interned to small integer ids
+- One file per day, rotated again when a file grows past a size limit
+- A day of ticks loads back with a single np.fromfile
+"""
+
+import atexit
+import json
+import os
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONFIG = {
+    'log_dir': './analysis_log',
+    'batch_size': 1000,                   # Records buffered before a flush
+    'max_file_bytes': 256 * 1024 * 1024,  # Rotate within a day past 256 MB
+}
+
+MAX_LEVELS = 8     # Matched zone ids kept per record
+MAX_PATTERNS = 6   # Pattern ids kept per record
+
+ACTIONS = ['', 'ENTER', 'WAIT', 'NO TRADE', 'IN POSITION']
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),                   # Unix seconds
+    ('price', '<f8'),
+    ('score', '<f4'),                       # Confluence score
+    ('latency_us', '<f4'),                  # analyze_price_level() wall time
+    ('action', 'u1'),                       # Index into ACTIONS
+    ('n_levels', 'u1'),
+    ('n_patterns', 'u1'),
+    ('levels', '<u2', (MAX_LEVELS,)),       # Interned zone names (0 = empty)
+    ('patterns', '<u2', (MAX_PATTERNS,)),   # Interned pattern types (0 = empty)
+])
+
+SCHEMA_FILE = 'schema.json'
+
+# =============================================================================
+# RECORDER
+# =============================================================================
+
+class AnalysisRecorder:
+    """Buffers analysis results and appends them to the daily log in batches"""
+
+    def __init__(self, log_dir: str = None, batch_size: int = None):
+        self.log_dir = log_dir or CONFIG['log_dir']
+        self.batch_size = batch_size or CONFIG['batch_size']
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        self.strings, self.string_ids = self._load_strings()
+        self._strings_dirty = False
+        self.action_ids = {action: i for i, action in enumerate(ACTIONS)}
+
+        self.buffer: List[tuple] = []
+        self.path = None
+        self._day_start = 0.0  # Unix time span of the current file's day
+        self._day_end = 0.0
+        self._part = 0
+
+        atexit.register(self.close)
+
+    # -------------------------------------------------------------------------
+    # Hot path
+    # -------------------------------------------------------------------------
+
+    def record(self, analysis: Dict):
+        """Buffer one analysis result (flushes every `batch_size` records)"""
+
+        intern = self._intern
+        levels = [intern(zone) for zone in analysis['zones'][:MAX_LEVELS]]
+        patterns = [intern(p['type'] if isinstance(p, dict) else p) for p in analysis['patterns'][:MAX_PATTERNS]]
+        rec = analysis['recommendation']
+
+        self.buffer.append((
+            analysis['timestamp'].timestamp(),
+            analysis['price'],
+            analysis['confluence_score'],
+            analysis.get('latency_us', 0.0),
+            self.action_ids.get(rec['action'], 0) if rec else 0,
+            len(levels),
+            len(patterns),
+            tuple(levels) + (0,) * (MAX_LEVELS - len(levels)),
+            tuple(patterns) + (0,) * (MAX_PATTERNS - len(patterns)),
+        ))
+
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def _intern(self, text: str) -> int:
+        string_id = self.string_ids.get(text)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(text)
+            self.string_ids[text] = string_id
+            self._strings_dirty = True
+        return string_id
+
+    # -------------------------------------------------------------------------
+    # Flushing and rotation
+    # -------------------------------------------------------------------------
+
+    def flush(self):
+        """Append buffered records to the log"""
+
+        if not self.buffer:
+            return
+
+        records = np.array(self.buffer, dtype=RECORD_DTYPE)
+        self.buffer = []
+
+        # Schema first, so every id in the log can always be decoded
+        if self._strings_dirty:
+            self._save_schema()
+
+        # Replayed timestamps can go back in time - sort, then split the batch
+        # at day boundaries so every record lands in its own day's file
+        records = records[np.argsort(records['timestamp'], kind='stable')]
+        start = 0
+        while start < len(records):
+            timestamp = records['timestamp'][start]
+            if not self._day_start <= timestamp < self._day_end or self._file_full():
+                self._open_file(timestamp)
+            end = start + int(np.searchsorted(records['timestamp'][start:], self._day_end))
+            with open(self.path, 'ab') as f:
+                records[start:end].tofile(f)
+            start = end
+
+    def close(self):
+        """Flush whatever is buffered"""
+        self.flush()
+
+    def _file_full(self) -> bool:
+        return os.path.exists(self.path) and os.path.getsize(self.path) >= CONFIG['max_file_bytes']
+
+    def _open_file(self, timestamp: float):
+        """Point self.path at the right file for `timestamp`, rotating by size"""
+
+        day = datetime.fromtimestamp(timestamp).date()
+        day_end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+        if day_end != self._day_end:
+            self._day_start = datetime.combine(day, datetime.min.time()).timestamp()
+            self._day_end = day_end
+            self._part = 0
+
+        while True:
+            suffix = f"-{self._part}" if self._part else ''
+            self.path = os.path.join(self.log_dir, f"analysis-{day:%Y%m%d}{suffix}.bin")
+            if not self._file_full():
+                return
+            self._part += 1
+
+    # -------------------------------------------------------------------------
+    # Schema (interned strings)
+    # -------------------------------------------------------------------------
+
+    def _load_strings(self):
+        schema = load_schema(self.log_dir)
+        strings = schema['strings'] if schema else ['']
+        return strings, {text: i for i, text in enumerate(strings)}
+
+    def _save_schema(self):
+        schema = {
+            'version': 1,
+            'dtype': RECORD_DTYPE.descr,
+            'actions': ACTIONS,
+            'strings': self.strings,
+        }
+        path = os.path.join(self.log_dir, SCHEMA_FILE)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(schema, f)
+        os.replace(f"{path}.tmp", path)
+        self._strings_dirty = False
+
+# =============================================================================
+# QUERYING
+# =============================================================================
+
+def load_schema(log_dir: str = None) -> Optional[Dict]:
+    """Schema (string table, actions) of a log directory"""
+
+    path = os.path.join(log_dir or CONFIG['log_dir'], SCHEMA_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def load_records(log_dir: str = None, start: datetime = None, end: datetime = None) -> np.ndarray:
+    """Raw records between `start` and `end` (local time), oldest first"""
+
+    log_dir = log_dir or CONFIG['log_dir']
+    first_day = f"{start:%Y%m%d}" if start else ''
+    last_day = f"{end:%Y%m%d}" if end else '99999999'
+
+    def part_order(name):
+        day, _, part = name[len('analysis-'):-len('.bin')].partition('-')
+        return day, int(part or 0)
+
+    files = sorted(
+        (name for name in os.listdir(log_dir)
+         if name.startswith('analysis-') and name.endswith('.bin')
+         and first_day <= name[len('analysis-'):len('analysis-') + 8] <= last_day),
+        key=part_order,
+    )
+    chunks = [np.fromfile(os.path.join(log_dir, name), dtype=RECORD_DTYPE) for name in files]
+    records = np.concatenate(chunks) if chunks else np.zeros(0, dtype=RECORD_DTYPE)
+    if len(records) and (np.diff(records['timestamp']) < 0).any():
+        records = records[np.argsort(records['timestamp'], kind='stable')]  # Replays appended out of order
+
+    if start or end:
+        lo = start.timestamp() if start else -np.inf
+        hi = end.timestamp() if end else np.inf
+        records = records[(records['timestamp'] >= lo) & (records['timestamp'] < hi)]
+    return records
+
+def to_dataframe(records: np.ndarray, log_dir: str = None, lists: bool = False):
+    """
+    Decode records into a pandas DataFrame (ids turned back into names).
+
+    Zone and pattern slots become categorical columns level_1..level_8 and
+    pattern_1..pattern_6 (NaN = empty slot), built straight from the id arrays.
+    lists=True also adds 'levels'/'patterns' list columns - that is row by row,
+    so use it on filtered selections rather than whole days.
+    """
+
+    import pandas as pd
+
+    schema = load_schema(log_dir) or {'strings': [''], 'actions': ACTIONS}
+    names = pd.Index(schema['strings'][1:])  # id 0 = empty slot -> code -1 = NaN
+
+    def slots(prefix, ids):
+        return {f"{prefix}_{k + 1}": pd.Categorical.from_codes(ids[:, k].astype(np.int32) - 1, categories=names)
+                for k in range(ids.shape[1])}
+
+    def decode(ids, counts):
+        strings = np.array(schema['strings'], dtype=object)
+        return [list(row[:n]) for row, n in zip(strings[ids], counts)]
+
+    # Back to naive local time, like the analysis timestamps
+    local_tz = datetime.now().astimezone().tzinfo
+    timestamps = pd.to_datetime(records['timestamp'], unit='s', utc=True).tz_convert(local_tz).tz_localize(None)
+
+    columns = {
+        'timestamp': timestamps,
+        'price': records['price'],
+        'score': records['score'],
+        'latency_us': records['latency_us'],
+        'action': pd.Categorical.from_codes(records['action'].astype(np.int32), categories=schema['actions']),
+        **slots('level', records['levels']),
+        **slots('pattern', records['patterns']),
+    }
+    if lists:
+        columns['levels'] = decode(records['levels'], records['n_levels'])
+        columns['patterns'] = decode(records['patterns'], records['n_patterns'])
+    return pd.DataFrame(columns)
+
+# =============================================================================
+# MAIN - OVERHEAD AND QUERY CHECK
+# =============================================================================
+
+if __name__ == "__main__":
+
+    import shutil
+    import tempfile
+    import time
+
+    log_dir = tempfile.mkdtemp(prefix='analysis_log_')
+    recorder = AnalysisRecorder(log_dir=log_dir)
+
+    sample = {
+        'timestamp': datetime(2025, 12, 4, 0, 0),
+        'price': 4247.50,
+        'confluence_score': 13.0,
+        'latency_us': 85.0,
+        'zones': ['1H R1', 'BEARISH OB $4246', 'Today High $4246.90'],
+        'patterns': [{'type': 'rejection_wick_bearish'}, 'Equal highs at $4136 - liquidity magnet'],
+        'recommendation': {'action': 'ENTER'},
+    }
+
+    # One tick per second for a full day
+    ticks = 24 * 60 * 60
+    start = time.perf_counter()
+    for i in range(ticks):
+        sample['timestamp'] = datetime(2025, 12, 4) + timedelta(seconds=i)
+        recorder.record(sample)
+    recorder.close()
+    elapsed = time.perf_counter() - start
+    print(f"Recorded {ticks} ticks: {elapsed / ticks * 1e6:.2f} µs per tick (flushes included)")
+
+    import pandas  # Import cost is not part of the query time
+
+    start = time.perf_counter()
+    day = load_records(log_dir, datetime(2025, 12, 4), datetime(2025, 12, 5))
+    frame = to_dataframe(day, log_dir)
+    print(f"Loaded and decoded {len(frame)} records in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(frame.tail(2).to_string())
+
+    # Query on the categorical slots, then build list columns for the selection only
+    at_r1 = frame.filter(like='level_').eq('1H R1').any(axis=1)
+    enters = to_dataframe(day[(at_r1 & frame['action'].eq('ENTER')).to_numpy()], log_dir, lists=True)
+    print(f"ENTER at 1H R1: {len(enters)} | first: {enters['levels'].iloc[0]}")
+
+    shutil.rmtree(log_dir)
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+BATCH CHART EVALUATOR
+Runs the Claude vision agent over an archive of chart screenshots and
+scores every call against what price actually did
+
+Features:
+- Walks a directory of chart images (chart_YYYYmmdd_HHMMSS.png from ScreenCapture)
+- Concurrent requests with a bounded number of workers
+- JSONL checkpoint: an interrupted run resumes where it stopped
+- Replies parsed into action / direction / entry / stop / target
+- Outcomes from the bar store: which of stop and target was hit first
+- Mock client for running the whole pipeline offline
+"""
+
+import json
+import os
+import re
+import time
+import numpy as np
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONFIG = {
+    'image_dir': './screenshots',
+    'checkpoint': './batch_results.jsonl',
+    'max_workers': 4,               # Concurrent API requests
+    'horizon_bars': 48,             # Bars a trade has to resolve (4h of 5-min bars)
+    'image_extensions': ('.png', '.jpg', '.jpeg', '.gif', '.webp'),
+}
+
+# =============================================================================
+# RESPONSE PARSING
+# =============================================================================
+
+_PRICE = r'\$?\s*([\d,]+(?:\.\d+)?)'
+_MD = r'[*_\s]*'   # whitespace plus markdown emphasis (**ENTER LONG**:, _WAIT_:)
+_WORD = r'(?<![A-Za-z0-9])'   # \b, except that _WAIT_ also starts a keyword
+
+# Action keywords are matched in capitals, as the prompt asks, so prose such
+# as "waiting for volume" is not mistaken for a call
+PATTERNS = {
+    'enter': re.compile(rf'{_WORD}ENTER{_MD}\[?{_MD}(LONG|SHORT){_MD}\]?{_MD}:?{_MD}(?:@|at)?\s*' + _PRICE),
+    'stop': re.compile(rf'Stop(?:\s*Loss)?{_MD}:?{_MD}' + _PRICE, re.IGNORECASE),
+    'target': re.compile(rf'Target\s*\d?{_MD}:?{_MD}' + _PRICE, re.IGNORECASE),
+    'why': re.compile(rf'Why{_MD}:{_MD}(.+)', re.IGNORECASE),
+    'wait': re.compile(rf'{_WORD}WAIT{_MD}:{_MD}(.*)'),
+    'no_trade': re.compile(rf'{_WORD}NO\s+TRADE{_MD}:{_MD}(.*)'),
+}
+
+def _price(text: str) -> float:
+    return float(text.replace(',', ''))
+
+def _clean(text: str) -> str:
+    return text.strip().strip('*_').strip()
+
+def parse_response(text: str) -> Dict:
+    """
+    Structured record from a reply in the analysis_prompt format:
+    action (ENTER/WAIT/NO TRADE/ERROR/UNKNOWN), direction, entry, stop, target, reason
+    """
+
+    record = {'action': 'UNKNOWN', 'direction': None, 'entry': None, 'stop': None,
+              'target': None, 'reason': ''}
+
+    if text.startswith('Error'):
+        record.update(action='ERROR', reason=text)
+        return record
+
+    # The prompt lists all three formats - the earliest one in the reply is the
+    # answer, later mentions ("would ENTER LONG at 4200 if...") are commentary
+    matches = [(m.start(), action, m) for action, m in
+               (('ENTER', PATTERNS['enter'].search(text)), ('NO TRADE', PATTERNS['no_trade'].search(text)),
+                ('WAIT', PATTERNS['wait'].search(text))) if m]
+    if not matches:
+        return record
+    _, action, m = min(matches, key=lambda match: match[0])
+
+    if action != 'ENTER':
+        record.update(action=action, reason=_clean(m.group(1)))
+        return record
+
+    record.update(action='ENTER', direction=m.group(1).upper(), entry=_price(m.group(2)))
+    rest = text[m.end():]
+    stop, target, why = (PATTERNS[key].search(rest) for key in ('stop', 'target', 'why'))
+    record['stop'] = _price(stop.group(1)) if stop else None
+    record['target'] = _price(target.group(1)) if target else None
+    record['reason'] = _clean(why.group(1)) if why else ''
+    return record
+
+# Replies seen from the model, with the fields parse_response must extract
+PARSER_CASES = [
+    ("✅ ENTER LONG: $4,205.50 | Stop: $4,195 | Target: $4,230 | Why: Asian low sweep",
+     {'action': 'ENTER', 'direction': 'LONG', 'entry': 4205.5, 'stop': 4195.0, 'target': 4230.0}),
+    ("✅ **ENTER LONG**: $4,205 | **Stop**: $4,195 | **Target**: $4,230 | **Why**: reclaim of 4200",
+     {'action': 'ENTER', 'direction': 'LONG', 'entry': 4205.0, 'stop': 4195.0, 'target': 4230.0,
+      'reason': 'reclaim of 4200'}),
+    ("ENTER [SHORT] @ 4250 | Stop Loss: 4262 | Target 1: 4220",
+     {'action': 'ENTER', 'direction': 'SHORT', 'entry': 4250.0, 'stop': 4262.0, 'target': 4220.0}),
+    ("⏳ WAIT: No clear level", {'action': 'WAIT', 'reason': 'No clear level'}),
+    ("⏳ **WAIT**: price is mid-range, waiting for volume",
+     {'action': 'WAIT', 'reason': 'price is mid-range, waiting for volume'}),
+    ("❌ NO TRADE: Chop under 4210. Would ENTER LONG at 4200 if it holds.",
+     {'action': 'NO TRADE', 'direction': None, 'entry': None}),
+    ("❌ _NO TRADE_: news in 10 minutes", {'action': 'NO TRADE', 'reason': 'news in 10 minutes'}),
+    ("I am waiting to enter long once volume confirms", {'action': 'UNKNOWN'}),
+    ("Error: 529 overloaded", {'action': 'ERROR'}),
+]
+
+def check_parser(cases: List = PARSER_CASES) -> List[str]:
+    """Failures of parse_response against (reply, expected fields) cases"""
+
+    failures = []
+    for text, expected in cases:
+        record = parse_response(text)
+        wrong = {k: record[k] for k, v in expected.items() if record[k] != v}
+        if wrong:
+            failures.append(f"{text!r}: got {wrong}, expected {({k: expected[k] for k in wrong})}")
+    return failures
+
+def image_timestamp(path: str) -> Optional[datetime]:
+    """Capture time from a chart_YYYYmmdd_HHMMSS filename"""
+
+    m = re.search(r'(\d{8}_\d{6})', os.path.basename(path))
+    return datetime.strptime(m.group(1), '%Y%m%d_%H%M%S') if m else None
+
+# =============================================================================
+# BATCH RUNNER
+# =============================================================================
+
+def list_images(image_dir: str) -> List[str]:
+    """Chart images anywhere under a directory (e.g. a date-partitioned archive), oldest capture first"""
+
+    paths = [os.path.join(root, name)
+             for root, _, names in os.walk(image_dir)
+             for name in names if name.lower().endswith(CONFIG['image_extensions'])]
+    return sorted(paths, key=lambda path: (image_timestamp(path) or datetime.min, path))
+
+def image_key(path: str, image_dir: str) -> str:
+    """Checkpoint key: path relative to the archive root, so same-named files in
+    different folders stay apart (a flat directory keys by file name as before)"""
+    return os.path.relpath(path, image_dir).replace(os.sep, '/')
+
+def load_checkpoint(path: str) -> Dict[str, Dict]:
+    """Records already written to a checkpoint, keyed by image (see image_key)"""
+
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line from an interrupted run
+                done[record['image']] = record
+    return done
+
+def run_batch(analyzer, image_dir: str = None, checkpoint: str = None,
+              max_workers: int = None, limit: int = None) -> Dict:
+    """
+    Analyze every image not yet in the checkpoint; `analyzer` is a ClaudeAnalyzer
+    (anything with analyze_chart(image_path=...)). Failed requests are not
+    checkpointed, so the next run retries them.
+    """
+
+    image_dir = image_dir or CONFIG['image_dir']
+    checkpoint = checkpoint or CONFIG['checkpoint']
+    max_workers = max_workers or CONFIG['max_workers']
+
+    done = load_checkpoint(checkpoint)
+    todo = [path for path in list_images(image_dir) if image_key(path, image_dir) not in done]
+    if limit:
+        todo = todo[:limit]
+
+    def analyze(path):
+        start = time.perf_counter()
+        reply = analyzer.analyze_chart(image_path=path)
+        return path, reply, time.perf_counter() - start
+
+    stats = {'skipped': len(done), 'analyzed': 0, 'errors': 0}
+    print(f"Batch: {len(todo)} images to analyze, {len(done)} already in {checkpoint}")
+
+    # An interrupted run can leave a torn last line - start on a fresh one
+    if os.path.exists(checkpoint) and os.path.getsize(checkpoint):
+        with open(checkpoint, 'rb+') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                f.write(b'\n')
+
+    pending = iter(todo)
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool, open(checkpoint, 'a') as out:
+        while True:
+            # Keep the queue short so thousands of images do not pile up as futures
+            while len(in_flight) < max_workers * 2:
+                path = next(pending, None)
+                if path is None:
+                    break
+                in_flight.add(pool.submit(analyze, path))
+            if not in_flight:
+                break
+
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                path, reply, seconds = future.result()
+                record = parse_response(reply)
+                if record['action'] == 'ERROR':
+                    stats['errors'] += 1
+                    print(f"  {image_key(path, image_dir)}: {reply}")
+                    continue
+
+                timestamp = image_timestamp(path)
+                record.update(image=image_key(path, image_dir), reply=reply, seconds=round(seconds, 3),
+                              timestamp=timestamp.isoformat() if timestamp else None)
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+                stats['analyzed'] += 1
+
+    return stats
+
+# =============================================================================
+# OUTCOME SCORING
+# =============================================================================
+
+def score_trade(record: Dict, bars: Dict[str, np.ndarray], horizon: int = None) -> Dict:
+    """
+    Outcome of one parsed reply against bars after its capture time.
+
+    ENTER: NOT_FILLED / WIN / LOSS / OPEN, plus the R multiple.
+    A bar touching both stop and target counts as a loss (conservative).
+    Every action also gets the price move over the horizon.
+    """
+
+    horizon = horizon or CONFIG['horizon_bars']
+    result = {'outcome': None, 'r_multiple': None, 'forward_move': None}
+
+    if not record.get('timestamp'):
+        result['outcome'] = 'NO_DATA'
+        return result
+
+    first = int(np.searchsorted(bars['timestamp'], np.datetime64(record['timestamp']), side='left'))
+    if first >= len(bars['close']):
+        result['outcome'] = 'NO_DATA'
+        return result
+    end = min(first + horizon, len(bars['close']))
+    highs, lows = bars['high'][first:end], bars['low'][first:end]
+    result['forward_move'] = round(float(bars['close'][end - 1] - bars['open'][first]), 2)
+
+    if record['action'] != 'ENTER':
+        return result
+
+    entry, stop, target = record['entry'], record['stop'], record['target']
+    side = 1 if record['direction'] == 'LONG' else -1
+    if stop is None or target is None or not (side * stop < side * entry < side * target):
+        result['outcome'] = 'INVALID'
+        return result
+
+    filled = np.flatnonzero((lows <= entry) & (highs >= entry))
+    if len(filled) == 0:
+        result['outcome'] = 'NOT_FILLED'
+        return result
+
+    # From the fill bar on: first stop hit vs first target hit
+    highs, lows = highs[filled[0]:], lows[filled[0]:]
+    stop_hits = np.flatnonzero(lows <= stop if side == 1 else highs >= stop)
+    target_hits = np.flatnonzero(highs >= target if side == 1 else lows <= target)
+    stop_at = stop_hits[0] if len(stop_hits) else len(highs)
+    target_at = target_hits[0] if len(target_hits) else len(highs)
+
+    if stop_at == target_at == len(highs):
+        result['outcome'] = 'OPEN'
+    elif stop_at <= target_at:
+        result.update(outcome='LOSS', r_multiple=-1.0)
+    else:
+        result.update(outcome='WIN', r_multiple=round(abs(target - entry) / abs(entry - stop), 2))
+    return result
+
+def evaluate(bars, checkpoint: str = None, horizon: int = None) -> List[Dict]:
+    """Checkpointed records joined with their outcomes against `bars` (dict of columns or DataFrame)"""
+
+    bars = {
+        'timestamp': np.asarray(bars['timestamp'], dtype='datetime64[s]'),
+        **{name: np.asarray(bars[name], dtype=float) for name in ('open', 'high', 'low', 'close')},
+    }
+    records = sorted(load_checkpoint(checkpoint or CONFIG['checkpoint']).values(), key=lambda r: r['image'])
+    return [dict(record, **score_trade(record, bars, horizon)) for record in records]
+
+def summarize(results: List[Dict]) -> Dict:
+    """Accuracy numbers over scored records"""
+
+    actions = {}
+    for r in results:
+        actions[r['action']] = actions.get(r['action'], 0) + 1
+
+    trades = [r for r in results if r['outcome'] in ('WIN', 'LOSS')]
+    wins = sum(r['outcome'] == 'WIN' for r in trades)
+    outcomes = {}
+    for r in results:
+        if r['action'] == 'ENTER':
+            outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+
+    return {
+        'images': len(results),
+        'actions': actions,
+        'enter_outcomes': outcomes,
+        'win_rate': wins / len(trades) if trades else None,
+        'avg_r': float(np.mean([r['r_multiple'] for r in trades])) if trades else None,
+        'total_r': float(sum(r['r_multiple'] for r in trades)),
+        'avg_seconds': float(np.mean([r['seconds'] for r in results])) if results else None,
+    }
+
+def format_summary(summary: Dict) -> str:
+    """Readable summary report"""
+
+    lines = [
+        "=" * 60,
+        "📊 VISION AGENT EVALUATION",
+        "=" * 60,
+        f"Images analyzed: {summary['images']}",
+        "Calls: " + " | ".join(f"{action} {count}" for action, count in sorted(summary['actions'].items())),
+        "ENTER outcomes: " + " | ".join(f"{outcome} {count}"
+                                        for outcome, count in sorted(summary['enter_outcomes'].items())),
+    ]
+    if summary['win_rate'] is not None:
+        lines += [
+            f"✅ Win rate: {summary['win_rate']:.0%}",
+            f"📈 Average R: {summary['avg_r']:+.2f} | Total R: {summary['total_r']:+.1f}",
+        ]
+    if summary['avg_seconds'] is not None:
+        lines.append(f"⏱️  Average response: {summary['avg_seconds']:.2f} s")
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+# =============================================================================
+# MOCK CLIENT - OFFLINE RUNS
+# =============================================================================
+
+class MockClient:
+    """Stands in for anthropic.Anthropic: messages.create() returns canned replies"""
+
+    REPLIES = [
+        "⏳ WAIT: Price between levels, waiting for a test of $4,200 support",
+        "❌ NO TRADE: Low volume chop in the middle of the range",
+        "✅ ENTER LONG: $4,205 | Stop: $4,195 | Target: $4,230 | Why: Rejection wick at $4,200 support",
+        "✅ ENTER SHORT: $4,245 | Stop: $4,255 | Target: $4,215 | Why: Double top at 1H R1",
+    ]
+
+    def __init__(self, responder=None, latency: float = 0.0):
+        # responder(request kwargs) -> reply text; default cycles through REPLIES
+        self.responder = responder
+        self.latency = latency
+        self.calls = 0
+        self.messages = self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.responder:
+            text = self.responder(kwargs)
+        else:
+            image = kwargs['messages'][0]['content'][0]['source']['data']
+            text = self.REPLIES[sum(image[-64:].encode()) % len(self.REPLIES)]
+        content = type('TextBlock', (), {'text': text, 'type': 'text'})()
+        return type('Message', (), {'content': [content]})()
+
+def load_chart_analyzer():
+    """The claude_chart_analyzer module (its file is not named *.py)"""
+
+    import importlib.util
+    from importlib.machinery import SourceFileLoader
+
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'claude_chart_analyzer.py - Claude visual analysis agent')
+    loader = SourceFileLoader('claude_chart_analyzer', path)
+    module = importlib.util.module_from_spec(importlib.util.spec_from_loader('claude_chart_analyzer', loader))
+    loader.exec_module(module)
+    return module
+
+# =============================================================================
+# MAIN - OFFLINE DEMO
+# =============================================================================
+
+if __name__ == "__main__":
+
+    import shutil
+    import tempfile
+    from datetime import timedelta
+
+    from chart_renderer import ChartRenderer, replay_frames
+
+    failures = check_parser()
+    print("\n".join(failures) if failures else f"✅ Parser: {len(PARSER_CASES)} reply formats")
+
+    # Synthetic 5-min bars, a chart "screenshot" every hour
+    rng = np.random.default_rng(8)
+    n = 2000
+    closes = 4215 + np.cumsum(rng.normal(0, 1.5, n))
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    bars = {
+        'timestamp': np.datetime64('2025-12-01T00:00') + np.arange(n).astype('timedelta64[m]') * 5,
+        'open': opens,
+        'high': np.maximum(opens, closes) + np.abs(rng.normal(0, 1, n)),
+        'low': np.minimum(opens, closes) - np.abs(rng.normal(0, 1, n)),
+        'close': closes,
+        'volume': rng.integers(200, 3000, n).astype(float),
+    }
+
+    work_dir = tempfile.mkdtemp(prefix='batch_eval_')
+    image_dir = os.path.join(work_dir, 'screenshots')
+    os.makedirs(image_dir)
+    last_close = {}
+    for timestamp, image in replay_frames(bars, ChartRenderer(), step=12):
+        # Captured as the last visible bar closes
+        captured = timestamp + timedelta(minutes=5)
+        # Archived by capture date, as screenshot tools usually do
+        name = os.path.join(f"{captured:%Y-%m-%d}", f"chart_{captured:%Y%m%d_%H%M%S}.png")
+        os.makedirs(os.path.join(image_dir, os.path.dirname(name)), exist_ok=True)
+        with open(os.path.join(image_dir, name), 'wb') as f:
+            f.write(image)
+        last_close[name] = float(bars['close'][np.searchsorted(bars['timestamp'], np.datetime64(timestamp))])
+
+    # The mock "model" buys a pullback or sells a pop around the last close
+    current = {}
+    def responder(kwargs):
+        price = current[hash(kwargs['messages'][0]['content'][0]['source']['data'])]
+        if rng.random() < 0.4:
+            return "⏳ WAIT: No clear level"
+        if rng.random() < 0.5:
+            return f"✅ ENTER LONG: ${price - 2:,.2f} | Stop: ${price - 10:,.2f} | Target: ${price + 14:,.2f} | Why: mock"
+        return f"✅ ENTER SHORT: ${price + 2:,.2f} | Stop: ${price + 10:,.2f} | Target: ${price - 14:,.2f} | Why: mock"
+
+    import base64
+    for name, price in last_close.items():
+        with open(os.path.join(image_dir, name), 'rb') as f:
+            current[hash(base64.standard_b64encode(f.read()).decode())] = price
+
+    chart_analyzer = load_chart_analyzer()
+    analyzer = chart_analyzer.ClaudeAnalyzer(client=MockClient(responder, latency=0.01))
+    checkpoint = os.path.join(work_dir, 'results.jsonl')
+
+    # Interrupted run, then a resumed one
+    print(run_batch(analyzer, image_dir, checkpoint, limit=50))
+    start = time.perf_counter()
+    print(run_batch(analyzer, image_dir, checkpoint))
+    print(f"Resumed run: {time.perf_counter() - start:.2f} s\n")
+
+    print(format_summary(summarize(evaluate(bars, checkpoint))))
+    shutil.rmtree(work_dir)
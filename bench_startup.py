@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+STARTUP BENCHMARK
+Measures cold-start time of each agent entry point up to "first tick ready"
+
+Every run is a fresh interpreter (exactly what the supervisor does after a
+crash), so module imports, knowledge base load and agent construction are
+all included.
+
+Usage:
+    python bench_startup.py            # 7 runs per entry point
+    python bench_startup.py 20         # 20 runs per entry point
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+TARGET_MS = 200
+
+# The agent files are not named *.py, so they are loaded explicitly
+LOADER = '''
+import importlib.util
+from importlib.machinery import SourceFileLoader
+loader = SourceFileLoader({name!r}, {path!r})
+mod = importlib.util.module_from_spec(importlib.util.spec_from_loader({name!r}, loader))
+loader.exec_module(mod)
+'''
+
+ENTRY_POINTS = {
+    # Import, build the agent and run one full tick against the (mock) feed
+    'rule-based agent': LOADER.format(
+        name='gold_alert_agent',
+        path=os.path.join(HERE, 'gold_alert_agent.py - Rule-based monitoring agent'),
+    ) + '''
+mod.CONFIG['alerts'] = dict.fromkeys(mod.CONFIG['alerts'], False)
+mod.TradingAgent().analyze_market()
+''',
+    # Import, build the analyzer and analyze the first price (no bars yet)
+    'intelligent agent': LOADER.format(
+        name='intelligent_gold_agent',
+        path=os.path.join(HERE, 'intelligent_gold_agent.py'),
+    ) + '''
+mod.IntelligentAnalyzer().analyze_price_level(4247.50, [])
+''',
+    # Import only - anthropic is loaded when ClaudeAnalyzer is created
+    'claude analyzer (import)': LOADER.format(
+        name='claude_chart_analyzer',
+        path=os.path.join(HERE, 'claude_chart_analyzer.py - Claude visual analysis agent'),
+    ),
+}
+
+# Entry points the sub-200 ms goal applies to
+GATED = ('rule-based agent', 'intelligent agent')
+
+
+def time_run(code: str) -> float:
+    """Wall-clock milliseconds for one fresh interpreter running `code`"""
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=HERE, check=True,
+                   stdout=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    """Run every entry point several times and report the median"""
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+
+    # Warm the OS file cache and the bytecode caches once
+    for code in ENTRY_POINTS.values():
+        time_run(code)
+
+    baseline = statistics.median(time_run('pass') for _ in range(runs))
+
+    print("="*80)
+    print(f"STARTUP BENCHMARK - median of {runs} cold starts")
+    print("="*80)
+    print(f"{'bare interpreter':<28} {baseline:8.1f} ms")
+
+    failed = False
+    for name, code in ENTRY_POINTS.items():
+        median = statistics.median(time_run(code) for _ in range(runs))
+        status = ''
+        if name in GATED:
+            ok = median < TARGET_MS
+            failed |= not ok
+            status = f"{'✅' if ok else '❌'} target < {TARGET_MS} ms"
+        print(f"{name:<28} {median:8.1f} ms   {status}")
+
+    print("="*80)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+HEADLESS CHART RENDERER
+Draws the chart straight from bar data - no screen, no toolbars, no other windows
+
+Features:
+- Candlesticks, volume panel, knowledge-base zones and round numbers
+- Fixed, model-friendly image size (1024 x 768 by default)
+- Incremental redraw: while a bar is forming only the last candle is repainted
+- In-memory PNG (or faster JPEG) bytes for ClaudeAnalyzer.analyze_chart(image_bytes=...)
+- Replay generator for backtesting the vision agent on historical bars
+"""
+
+import io
+import numpy as np
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+
+# PIL is imported when the first renderer is created
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONFIG = {
+    'width': 1024,
+    'height': 768,
+    'bars_visible': 120,        # Candles on screen
+    'volume_panel': 0.20,       # Fraction of the plot height used for volume
+    'price_padding': 0.08,      # Extra room above/below the visible range
+    'image_format': 'PNG',      # PNG (lossless, ~15 ms to encode) or JPEG (~3 ms)
+    'png_compress_level': 1,    # Speed over size - the API does not care
+    'jpeg_quality': 90,
+    'title': 'GC 5m',
+
+    'colors': {
+        'background': (19, 23, 34),
+        'grid': (42, 46, 57),
+        'text': (178, 181, 190),
+        'up': (38, 166, 154),
+        'down': (239, 83, 80),
+        'volume_up': (38, 166, 154, 110),
+        'volume_down': (239, 83, 80, 110),
+        'support': (38, 166, 154, 45),
+        'resistance': (239, 83, 80, 45),
+        'round_number': (120, 123, 134),
+        'last_price': (255, 193, 7),
+    },
+}
+
+MARGIN_LEFT = 10
+MARGIN_TOP = 28
+MARGIN_BOTTOM = 24
+AXIS_WIDTH = 70  # Price labels on the right
+
+# =============================================================================
+# ZONES
+# =============================================================================
+
+def knowledge_zones(knowledge: Dict = None) -> List[Dict]:
+    """Daily/hourly zones from KNOWLEDGE_BASE tagged 'support' or 'resistance'"""
+
+    if knowledge is None:
+        from intelligent_gold_agent import KNOWLEDGE_BASE as knowledge
+
+    zones = []
+    for timeframe in ('daily_zones', 'hourly_zones'):
+        for zone_type, zone_list in knowledge[timeframe].items():
+            kind = 'resistance' if 'resistance' in zone_type else 'support'
+            zones.extend(dict(zone, kind=kind) for zone in zone_list)
+    return zones
+
+def knowledge_round_numbers(knowledge: Dict = None) -> List[float]:
+    """Major round numbers from KNOWLEDGE_BASE"""
+
+    if knowledge is None:
+        from intelligent_gold_agent import KNOWLEDGE_BASE as knowledge
+    return list(knowledge['round_numbers']['major'])
+
+# =============================================================================
+# RENDERER
+# =============================================================================
+
+class ChartRenderer:
+    """Renders OHLCV bars into a fixed-size image, reusing the unchanged part"""
+
+    def __init__(self, zones: List[Dict] = None, round_numbers: List[float] = None,
+                 width: int = None, height: int = None, bars_visible: int = None):
+        from PIL import Image, ImageDraw, ImageFont
+        self._Image, self._ImageDraw = Image, ImageDraw
+        self.font = ImageFont.load_default()
+
+        self.width = width or CONFIG['width']
+        self.height = height or CONFIG['height']
+        self.bars_visible = bars_visible or CONFIG['bars_visible']
+        self.zones = knowledge_zones() if zones is None else zones
+        self.round_numbers = knowledge_round_numbers() if round_numbers is None else round_numbers
+
+        plot_bottom = self.height - MARGIN_BOTTOM
+        plot_height = plot_bottom - MARGIN_TOP
+        self.volume_top = plot_bottom - int(plot_height * CONFIG['volume_panel'])
+        self.price_top, self.price_bottom = MARGIN_TOP, self.volume_top - 8
+        self.plot_right = self.width - AXIS_WIDTH
+        self.slot = (self.plot_right - MARGIN_LEFT) / self.bars_visible
+
+        # Base layer: everything except the last candle
+        self._base = None
+        self._base_key = None
+        self._scale_cache = None
+        self.last_render_incremental = False
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def render(self, bars, title: str = None):
+        """PIL image of the last `bars_visible` bars (dict of columns or DataFrame)"""
+
+        cols = self._columns(bars)
+        # Without timestamps there is no way to tell a new window from the same
+        # one, so every render redraws the base
+        key = None
+        if 'timestamp' in bars and len(cols['close']) > 1:
+            key = (len(cols['close']), cols['timestamp'][-2], title)
+
+        # Only the forming bar changed and it still fits the scale: reuse the base
+        self.last_render_incremental = (key is not None and key == self._base_key
+                                        and self._fits(cols, self._scale_cache))
+        if not self.last_render_incremental:
+            self._scale_cache = self._scale(cols)
+            self._base = self._draw_base(cols, self._scale_cache, title or CONFIG['title'])
+            self._base_key = key
+        scale = self._scale_cache
+
+        image = self._base.copy()
+        self._draw_last(self._ImageDraw.Draw(image, 'RGBA'), cols, scale)
+        return image
+
+    def render_bytes(self, bars, title: str = None) -> bytes:
+        """Rendered chart encoded as CONFIG['image_format'] (see media_type)"""
+
+        buffer = io.BytesIO()
+        image = self.render(bars, title)
+        if CONFIG['image_format'] == 'JPEG':
+            image.save(buffer, format='JPEG', quality=CONFIG['jpeg_quality'])
+        else:
+            image.save(buffer, format='PNG', compress_level=CONFIG['png_compress_level'])
+        return buffer.getvalue()
+
+    @property
+    def media_type(self) -> str:
+        """MIME type of render_bytes() output"""
+        return 'image/jpeg' if CONFIG['image_format'] == 'JPEG' else 'image/png'
+
+    # -------------------------------------------------------------------------
+    # Geometry
+    # -------------------------------------------------------------------------
+
+    def _columns(self, bars) -> Dict[str, np.ndarray]:
+        n = min(len(bars['close']), self.bars_visible)
+        cols = {name: np.asarray(bars[name])[-n:].astype(float)
+                for name in ('open', 'high', 'low', 'close', 'volume')}
+        cols['timestamp'] = np.asarray(bars['timestamp'])[-n:] if 'timestamp' in bars else np.arange(n)
+        return cols
+
+    @staticmethod
+    def _scale(cols: Dict[str, np.ndarray]) -> Tuple[float, float, float]:
+        """(price low, price high, volume max), rounded so small moves keep the scale"""
+
+        low, high = float(cols['low'].min()), float(cols['high'].max())
+        pad = max((high - low) * CONFIG['price_padding'], 1.0)
+        step = 10 ** np.floor(np.log10(pad))
+        lo = np.floor((low - pad) / step) * step
+        hi = np.ceil((high + pad) / step) * step
+
+        vol_max = float(cols['volume'].max()) or 1.0
+        vol_step = 10 ** np.floor(np.log10(vol_max))
+        return float(lo), float(hi), float(np.ceil(vol_max * 1.25 / vol_step) * vol_step)
+
+    @staticmethod
+    def _fits(cols: Dict[str, np.ndarray], scale: Tuple[float, float, float]) -> bool:
+        """True if the forming bar is still inside the current scale"""
+        lo, hi, vol_max = scale
+        return lo <= cols['low'][-1] and cols['high'][-1] <= hi and cols['volume'][-1] <= vol_max
+
+    def _y(self, prices, scale):
+        lo, hi, _ = scale
+        return self.price_bottom - (np.asarray(prices, dtype=float) - lo) / (hi - lo) * (self.price_bottom - self.price_top)
+
+    def _candle_geometry(self, cols, scale, index: slice) -> Dict[str, np.ndarray]:
+        """Pixel coordinates of a run of candles (vectorized)"""
+
+        i = np.arange(len(cols['close']))[index]
+        centre = MARGIN_LEFT + (i + 0.5) * self.slot
+        half = max(self.slot * 0.35, 1.0)
+        open_y, close_y = self._y(cols['open'][index], scale), self._y(cols['close'][index], scale)
+        volume_bottom = self.height - MARGIN_BOTTOM
+        return {
+            'x0': centre - half, 'x1': centre + half, 'centre': centre,
+            'high': self._y(cols['high'][index], scale), 'low': self._y(cols['low'][index], scale),
+            'top': np.minimum(open_y, close_y), 'bottom': np.maximum(open_y, close_y),
+            'volume_top': volume_bottom - cols['volume'][index] / scale[2] * (volume_bottom - self.volume_top),
+            'up': cols['close'][index] >= cols['open'][index],
+        }
+
+    # -------------------------------------------------------------------------
+    # Drawing
+    # -------------------------------------------------------------------------
+
+    def _draw_base(self, cols, scale, title: str):
+        """Background, grid, zones, axis and all completed candles"""
+
+        colors = CONFIG['colors']
+        image = self._Image.new('RGB', (self.width, self.height), colors['background'])
+        draw = self._ImageDraw.Draw(image, 'RGBA')
+        lo, hi, _ = scale
+
+        # Grid and price labels
+        step = _nice_step((hi - lo) / 8)
+        for price in np.arange(np.ceil(lo / step) * step, hi, step):
+            y = float(self._y(price, scale))
+            draw.line([(MARGIN_LEFT, y), (self.plot_right, y)], fill=colors['grid'])
+            draw.text((self.plot_right + 6, y - 6), f"{price:,.0f}", fill=colors['text'], font=self.font)
+        draw.line([(MARGIN_LEFT, self.volume_top), (self.plot_right, self.volume_top)], fill=colors['grid'])
+
+        # Zones and round numbers that intersect the visible range
+        for zone in self.zones:
+            if zone['high'] < lo or zone['low'] > hi:
+                continue
+            top, bottom = self._y([min(zone['high'], hi), max(zone['low'], lo)], scale)
+            draw.rectangle([MARGIN_LEFT, top, self.plot_right, bottom], fill=colors[zone.get('kind', 'support')])
+            draw.text((MARGIN_LEFT + 4, top + 2), zone['name'], fill=colors['text'], font=self.font)
+        for price in self.round_numbers:
+            if lo < price < hi:
+                y = float(self._y(price, scale))
+                for x in range(MARGIN_LEFT, int(self.plot_right), 12):
+                    draw.line([(x, y), (x + 6, y)], fill=colors['round_number'])
+
+        # Time labels every ~quarter of the chart
+        timestamps = cols['timestamp']
+        if np.issubdtype(timestamps.dtype, np.datetime64):
+            for i in range(0, len(timestamps), max(len(timestamps) // 4, 1)):
+                label = str(timestamps[i].astype('datetime64[m]')).replace('T', ' ')[5:]
+                x = MARGIN_LEFT + (i + 0.5) * self.slot
+                draw.text((x, self.height - MARGIN_BOTTOM + 6), label, fill=colors['text'], font=self.font)
+
+        draw.text((MARGIN_LEFT, 8), title, fill=colors['text'], font=self.font)
+
+        # Completed candles
+        self._draw_candles(draw, self._candle_geometry(cols, scale, slice(None, -1)))
+        return image
+
+    def _draw_last(self, draw, cols, scale):
+        """Forming candle plus the last-price marker"""
+
+        colors = CONFIG['colors']
+        self._draw_candles(draw, self._candle_geometry(cols, scale, slice(-1, None)))
+
+        price = float(cols['close'][-1])
+        y = float(self._y(price, scale))
+        draw.line([(MARGIN_LEFT, y), (self.plot_right, y)], fill=colors['last_price'] + (90,))
+        draw.rectangle([self.plot_right + 2, y - 8, self.width - 2, y + 8], fill=colors['last_price'])
+        draw.text((self.plot_right + 6, y - 6), f"{price:,.2f}", fill=colors['background'], font=self.font)
+
+    def _draw_candles(self, draw, g: Dict[str, np.ndarray]):
+        colors = CONFIG['colors']
+        volume_bottom = self.height - MARGIN_BOTTOM
+        rows = zip(g['x0'].tolist(), g['x1'].tolist(), g['centre'].tolist(), g['high'].tolist(),
+                   g['low'].tolist(), g['top'].tolist(), g['bottom'].tolist(),
+                   g['volume_top'].tolist(), g['up'].tolist())
+        for x0, x1, centre, high, low, top, bottom, volume_top, up in rows:
+            color = colors['up'] if up else colors['down']
+            draw.line([(centre, high), (centre, low)], fill=color)
+            draw.rectangle([x0, top, x1, max(bottom, top + 1)], fill=color)
+            draw.rectangle([x0, volume_top, x1, volume_bottom],
+                           fill=colors['volume_up'] if up else colors['volume_down'])
+
+def _nice_step(raw: float) -> float:
+    """1, 2 or 5 x 10^n step at least `raw`"""
+
+    magnitude = 10 ** np.floor(np.log10(raw))
+    for multiple in (1, 2, 5, 10):
+        if multiple * magnitude >= raw:
+            return float(multiple * magnitude)
+    return float(10 * magnitude)
+
+# =============================================================================
+# REPLAY
+# =============================================================================
+
+def replay_frames(bars, renderer: ChartRenderer = None, start: int = None,
+                  step: int = 1) -> Iterator[Tuple[datetime, bytes]]:
+    """
+    (bar timestamp, image bytes) for every `step`-th bar of a history, as the
+    chart looked when that bar closed - feeds the vision agent in backtests.
+    """
+
+    renderer = renderer or ChartRenderer()
+    columns = {name: np.asarray(bars[name]) for name in ('timestamp', 'open', 'high', 'low', 'close', 'volume')}
+    start = renderer.bars_visible if start is None else start
+
+    for end in range(start, len(columns['close']) + 1, step):
+        window = {name: values[max(0, end - renderer.bars_visible):end] for name, values in columns.items()}
+        timestamp = window['timestamp'][-1]
+        if isinstance(timestamp, np.datetime64):
+            timestamp = timestamp.astype('datetime64[us]').item()
+        yield timestamp, renderer.render_bytes(window)
+
+# =============================================================================
+# MAIN - RENDER SPEED CHECK
+# =============================================================================
+
+if __name__ == "__main__":
+
+    import os
+    import tempfile
+    import time
+
+    rng = np.random.default_rng(5)
+    n = 500
+    closes = 4215 + np.cumsum(rng.normal(0, 1.5, n))
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    bars = {
+        'timestamp': np.datetime64('2025-12-04T08:00') + np.arange(n).astype('timedelta64[m]') * 5,
+        'open': opens,
+        'high': np.maximum(opens, closes) + np.abs(rng.normal(0, 1, n)),
+        'low': np.minimum(opens, closes) - np.abs(rng.normal(0, 1, n)),
+        'close': closes,
+        'volume': rng.integers(200, 3000, n).astype(float),
+    }
+
+    renderer = ChartRenderer()
+
+    t = time.perf_counter()
+    image = renderer.render_bytes(bars)
+    print(f"Full render + {CONFIG['image_format']}: {(time.perf_counter() - t) * 1000:.1f} ms ({len(image) / 1024:.0f} KB)")
+
+    # Ticks inside the forming bar only repaint the last candle
+    ticks = 100
+    render_time = 0.0
+    t = time.perf_counter()
+    for _ in range(ticks):
+        bars['close'][-1] += rng.normal(0, 0.2)
+        bars['high'][-1] = max(bars['high'][-1], bars['close'][-1])
+        bars['low'][-1] = min(bars['low'][-1], bars['close'][-1])
+        r = time.perf_counter()
+        renderer.render(bars)
+        render_time += time.perf_counter() - r
+    image = renderer.render_bytes(bars)
+    print(f"Incremental render: {render_time / ticks * 1000:.2f} ms "
+          f"(reused base: {renderer.last_render_incremental})")
+
+    CONFIG['image_format'] = 'JPEG'
+    t = time.perf_counter()
+    renderer.render_bytes(bars)
+    print(f"Incremental render + JPEG: {(time.perf_counter() - t) * 1000:.1f} ms")
+
+    # Kept outside the tree for a look at the result
+    path = os.path.join(tempfile.mkdtemp(prefix='chart_renderer_'), 'rendered_chart.png')
+    with open(path, 'wb') as f:
+        f.write(image)
+    print(f"Saved {path}")
@@ -7,11 +7,33 @@ Volume Profile, Liquidity, PDH/PDL, Multi-timeframe confluence, and more.
 This is the COMPLETE agent with all our knowledge embedded.
 """
 
-import pandas as pd
-import numpy as np
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
-import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+import time
+from typing import TYPE_CHECKING, Dict, Optional
+
+from session_calendar import SessionCalendar
+
+if TYPE_CHECKING:
+    from position_manager import PositionManager
+    from volume_profile import VolumeProfile
+    from analysis_recorder import AnalysisRecorder
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+def _bar_columns(bars) -> Dict:
+    """
+    Bars as indexable columns, oldest first. Accepts a DataFrame or a dict of
+    column arrays (DataFeed.get_recent_bars) - numpy/pandas are not imported here.
+    """
+    if bars is None or len(bars) == 0:
+        return {col: [] for col in BAR_COLUMNS}
+    return {col: bars[col].to_numpy() if hasattr(bars[col], 'to_numpy') else bars[col]
+            for col in BAR_COLUMNS}
+
+def _last_bar(bars: Dict) -> Dict:
+    """Most recent bar as a plain dict of scalars"""
+    return {col: values[-1] for col, values in bars.items()}
 
 # =============================================================================
 # KNOWLEDGE BASE - ALL OUR LEARNED ZONES AND PATTERNS
@@ -193,6 +215,16 @@ KNOWLEDGE_BASE = {
         },
     },
     
+    # === TRADE SETUP RISK RULES ===
+    'risk': {
+        'atr_period': 14,          # Bars in the ATR window
+        'atr_stop_multiple': 1.5,  # Stop = entry -/+ 1.5 x ATR
+        'min_stop': 5,             # Never tighter than $5
+        'fallback_stop': 15,       # $ stop when there are too few bars for ATR
+        'target1_r': 2.0,          # Target 1 at 2R
+        'target2_r': 3.0,          # Target 2 at 3R when no level lies beyond target 1
+    },
+    
     # === CONFLUENCE SCORING ===
     'confluence_weights': {
         'daily_tier1_zone': 5,
@@ -218,26 +250,53 @@ KNOWLEDGE_BASE = {
 class IntelligentAnalyzer:
     """Applies ALL our learned analysis in real-time"""
     
-    def __init__(self):
+    def __init__(self, positions: 'PositionManager' = None, symbol: str = 'GC',
+                 volume_profile: 'VolumeProfile' = None, recorder: 'AnalysisRecorder' = None):
         self.knowledge = KNOWLEDGE_BASE
-        
-    def analyze_price_level(self, price: float, recent_bars: pd.DataFrame) -> Dict:
+        self.positions = positions  # Optional - tracks ENTER setups after the alert
+        self.volume_profile = volume_profile  # Optional - live HVNs replace the static list
+        self.recorder = recorder  # Optional - keeps every analysis for post-trade review
+        self.symbol = symbol
+        self.calendar = SessionCalendar(self.knowledge['time_patterns'])
+        self._build_level_index()
+        
+    def _build_level_index(self):
+        """Sorted support (zone lows) and resistance (zone highs) levels for bisect lookups"""
+        
+        zone_groups = list(self.knowledge['daily_zones'].items()) + list(self.knowledge['hourly_zones'].items())
+        self.support_levels = sorted(
+            zone['low'] for zone_type, zones in zone_groups if 'support' in zone_type for zone in zones
+        )
+        self.resistance_levels = sorted(
+            zone['high'] for zone_type, zones in zone_groups if 'resistance' in zone_type for zone in zones
+        )
+        
+    def analyze_price_level(self, price: float, recent_bars, timestamp: datetime = None) -> Dict:
         """
         Comprehensive analysis of current price level.
         Returns confluence score and all applicable patterns.
+        `recent_bars` is a DataFrame or a dict of column arrays, oldest first.
+        `timestamp` is the tick time (default now) - set it when replaying history.
         """
         
+        started = time.perf_counter()
+        bars = _bar_columns(recent_bars)
         analysis = {
             'price': price,
-            'timestamp': datetime.now(),
+            'timestamp': timestamp or datetime.now(),
             'confluences': [],
             'patterns': [],
             'zones': [],
             'trade_setups': [],
             'confluence_score': 0,
             'recommendation': None,
+            'position_events': [],
         }
         
+        # Advance tracked positions first (fills, targets, stops)
+        if self.positions is not None:
+            analysis['position_events'] = self.positions.on_tick(self.symbol, price, analysis['timestamp'])
+        
         # Check all zone types
         analysis = self._check_daily_zones(price, analysis)
         analysis = self._check_hourly_zones(price, analysis)
@@ -249,19 +308,27 @@ class IntelligentAnalyzer:
         analysis = self._check_session_levels(price, analysis)
         
         # Check patterns
-        analysis = self._check_rejection_patterns(recent_bars, analysis)
-        analysis = self._check_liquidity_grabs(recent_bars, analysis)
-        analysis = self._check_breakout_patterns(recent_bars, analysis)
+        analysis = self._check_rejection_patterns(bars, analysis)
+        analysis = self._check_liquidity_grabs(bars, analysis)
+        analysis = self._check_breakout_patterns(bars, analysis)
         
         # Multi-timeframe confluence
         analysis = self._calculate_confluence_score(analysis)
         
         # Generate trade setups
-        analysis = self._generate_trade_setups(price, recent_bars, analysis)
+        analysis = self._generate_trade_setups(price, bars, analysis)
         
         # Final recommendation
         analysis = self._make_recommendation(analysis)
         
+        # Track new setups - and stop re-alerting one that is already live
+        if self.positions is not None:
+            analysis = self._track_recommendation(analysis)
+        
+        analysis['latency_us'] = (time.perf_counter() - started) * 1e6
+        if self.recorder is not None:
+            self.recorder.record(analysis)
+        
         return analysis
     
     def _check_daily_zones(self, price: float, analysis: Dict) -> Dict:
@@ -387,23 +454,31 @@ class IntelligentAnalyzer:
     def _check_volume_profile(self, price: float, analysis: Dict) -> Dict:
         """Check if at high volume node"""
         
-        for hvn in self.knowledge['volume_profile']:
+        if self.volume_profile is not None:
+            hvns = self.volume_profile.high_volume_nodes('composite')
+        else:
+            hvns = self.knowledge['volume_profile']
+        
+        # Only the nearest node counts - a live composite can put several
+        # peaks inside the $20 window, which would stack past the ENTER threshold
+        near = [hvn for hvn in hvns if abs(price - hvn['price']) <= 20]  # Within $20 of HVN
+        if near:
+            hvn = min(near, key=lambda node: abs(price - node['price']))
             distance = abs(price - hvn['price'])
-            if distance <= 20:  # Within $20 of HVN
-                analysis['confluences'].append({
-                    'type': 'volume_profile_hvn',
-                    'price': hvn['price'],
-                    'volume': hvn['volume'],
-                    'significance': hvn['significance'],
-                    'note': hvn['note'],
-                    'distance': distance,
-                    'weight': self.knowledge['confluence_weights']['volume_profile_hvn'],
-                })
-                analysis['zones'].append(f"HVN ${hvn['price']:.0f}")
-                if hvn['significance'] == 'EXTREME':
-                    analysis['confluence_score'] += 5
-                elif hvn['significance'] == 'VERY_HIGH':
-                    analysis['confluence_score'] += 4
+            analysis['confluences'].append({
+                'type': 'volume_profile_hvn',
+                'price': hvn['price'],
+                'volume': hvn['volume'],
+                'significance': hvn['significance'],
+                'note': hvn['note'],
+                'distance': distance,
+                'weight': self.knowledge['confluence_weights']['volume_profile_hvn'],
+            })
+            analysis['zones'].append(f"HVN ${hvn['price']:.0f}")
+            if hvn['significance'] == 'EXTREME':
+                analysis['confluence_score'] += 5
+            elif hvn['significance'] == 'VERY_HIGH':
+                analysis['confluence_score'] += 4
         
         return analysis
     
@@ -508,13 +583,13 @@ class IntelligentAnalyzer:
         
         return analysis
     
-    def _check_rejection_patterns(self, bars: pd.DataFrame, analysis: Dict) -> Dict:
+    def _check_rejection_patterns(self, bars: Dict, analysis: Dict) -> Dict:
         """Detect rejection wick patterns"""
         
-        if len(bars) < 2:
+        if len(bars['close']) < 2:
             return analysis
         
-        last_bar = bars.iloc[-1]
+        last_bar = _last_bar(bars)
         pattern_rules = self.knowledge['patterns']['rejection_wick']
         
         # Upper wick (bearish rejection)
@@ -550,18 +625,16 @@ class IntelligentAnalyzer:
         
         return analysis
     
-    def _check_liquidity_grabs(self, bars: pd.DataFrame, analysis: Dict) -> Dict:
+    def _check_liquidity_grabs(self, bars: Dict, analysis: Dict) -> Dict:
         """Detect liquidity grab patterns"""
         
-        if len(bars) < 3:
+        if len(bars['close']) < 3:
             return analysis
         
-        recent = bars.tail(3)
-        last_bar = recent.iloc[-1]
-        prev_bar = recent.iloc[-2]
+        last_bar = _last_bar(bars)
         
         # Check for sweep below previous low
-        prev_low = recent.iloc[:-1]['low'].min()
+        prev_low = min(bars['low'][-3:-1])
         if last_bar['low'] < prev_low - 5:  # Swept below
             if last_bar['close'] > prev_low:  # But closed back above
                 analysis['patterns'].append({
@@ -574,7 +647,7 @@ class IntelligentAnalyzer:
                 analysis['confluence_score'] += 4
         
         # Check for sweep above previous high
-        prev_high = recent.iloc[:-1]['high'].max()
+        prev_high = max(bars['high'][-3:-1])
         if last_bar['high'] > prev_high + 5:  # Swept above
             if last_bar['close'] < prev_high:  # But closed back below
                 analysis['patterns'].append({
@@ -588,18 +661,17 @@ class IntelligentAnalyzer:
         
         return analysis
     
-    def _check_breakout_patterns(self, bars: pd.DataFrame, analysis: Dict) -> Dict:
+    def _check_breakout_patterns(self, bars: Dict, analysis: Dict) -> Dict:
         """Detect breakout patterns"""
         
-        if len(bars) < 10:
+        if len(bars['close']) < 10:
             return analysis
         
-        recent = bars.tail(10)
-        last_bar = bars.iloc[-1]
+        last_bar = _last_bar(bars)
         
-        range_high = recent['high'].max()
-        range_low = recent['low'].min()
-        avg_volume = bars['volume'].mean()
+        range_high = max(bars['high'][-10:])
+        range_low = min(bars['low'][-10:])
+        avg_volume = sum(bars['volume']) / len(bars['volume'])
         
         # Breakout above range
         if last_bar['close'] > range_high and last_bar['volume'] > avg_volume * 2:
@@ -646,7 +718,7 @@ class IntelligentAnalyzer:
         
         return analysis
     
-    def _generate_trade_setups(self, price: float, bars: pd.DataFrame, analysis: Dict) -> Dict:
+    def _generate_trade_setups(self, price: float, bars: Dict, analysis: Dict) -> Dict:
         """Generate specific trade setups based on analysis"""
         
         if len(analysis['confluences']) == 0:
@@ -660,72 +732,75 @@ class IntelligentAnalyzer:
         
         # LONG setups (at support)
         if support_confluences and analysis['confluence_score'] >= 10:
-            nearest_resistance = self._find_nearest_level(price, 'resistance')
-            setup = {
-                'direction': 'LONG',
-                'entry': f"${price:.2f}",
-                'stop_loss': f"${price - 15:.2f}",
-                'target1': f"${price + 30:.2f}",
-                'target2': f"${nearest_resistance:.2f}" if nearest_resistance else f"${price + 50:.2f}",
-                'risk_reward': '1:3+',
-                'confluence_score': analysis['confluence_score'],
-                'reason': f"Multiple support confluences: {', '.join(analysis['zones'][:3])}",
-            }
+            setup = self._build_setup('LONG', price, bars)
+            setup['reason'] = f"Multiple support confluences: {', '.join(analysis['zones'][:3])}"
+            setup['confluence_score'] = analysis['confluence_score']
             analysis['trade_setups'].append(setup)
         
         # SHORT setups (at resistance)
         if resistance_confluences and analysis['confluence_score'] >= 10:
-            nearest_support = self._find_nearest_level(price, 'support')
-            setup = {
-                'direction': 'SHORT',
-                'entry': f"${price:.2f}",
-                'stop_loss': f"${price + 15:.2f}",
-                'target1': f"${price - 30:.2f}",
-                'target2': f"${nearest_support:.2f}" if nearest_support else f"${price - 50:.2f}",
-                'risk_reward': '1:3+',
-                'confluence_score': analysis['confluence_score'],
-                'reason': f"Multiple resistance confluences: {', '.join(analysis['zones'][:3])}",
-            }
+            setup = self._build_setup('SHORT', price, bars)
+            setup['reason'] = f"Multiple resistance confluences: {', '.join(analysis['zones'][:3])}"
+            setup['confluence_score'] = analysis['confluence_score']
             analysis['trade_setups'].append(setup)
         
         return analysis
     
-    def _find_nearest_level(self, price: float, level_type: str) -> Optional[float]:
-        """Find nearest support or resistance level"""
+    def _build_setup(self, direction: str, price: float, bars: Dict) -> Dict:
+        """
+        Numeric trade setup: ATR-based stop, target 1 at a fixed R multiple,
+        target 2 at the next level beyond target 1.
+        """
+        
+        rules = self.knowledge['risk']
+        d = 1 if direction == 'LONG' else -1
+        
+        atr = self._average_true_range(bars, rules['atr_period'])
+        risk = float(max(atr * rules['atr_stop_multiple'], rules['min_stop']) if atr is not None else rules['fallback_stop'])
+        
+        stop_loss = price - d * risk
+        target1 = price + d * risk * rules['target1_r']
+        target2 = self._find_nearest_level(target1, 'resistance' if d == 1 else 'support')
+        if target2 is None:
+            target2 = price + d * risk * rules['target2_r']
+        
+        return {
+            'direction': direction,
+            'entry': price,
+            'stop_loss': stop_loss,
+            'target1': target1,
+            'target2': float(target2),
+            'risk': risk,
+            'risk_reward': abs(target2 - price) / risk,
+            'atr': atr,
+        }
+    
+    @staticmethod
+    def _average_true_range(bars: Dict, period: int) -> Optional[float]:
+        """Simple ATR over the last `period` bars (None if fewer than 2 bars)"""
+        
+        if len(bars['close']) < 2:
+            return None
+        
+        import numpy as np  # Only needed once a setup is built
         
-        levels = []
+        window = period + 1  # One extra bar for the first previous close
+        highs = np.asarray(bars['high'][-window:], dtype=float)[1:]
+        lows = np.asarray(bars['low'][-window:], dtype=float)[1:]
+        prev_closes = np.asarray(bars['close'][-window:], dtype=float)[:-1]
+        
+        true_ranges = np.maximum(highs - lows, np.maximum(np.abs(highs - prev_closes), np.abs(lows - prev_closes)))
+        return float(true_ranges.mean())
+    
+    def _find_nearest_level(self, price: float, level_type: str) -> Optional[float]:
+        """Find nearest support below or resistance above `price`"""
         
-        # Collect all relevant levels
         if level_type == 'support':
-            for zone_list in self.knowledge['daily_zones'].values():
-                if 'support' in str(zone_list):
-                    for zone in zone_list:
-                        if zone['low'] < price:
-                            levels.append(zone['low'])
-            
-            for zone in self.knowledge['hourly_zones']['support']:
-                if zone['low'] < price:
-                    levels.append(zone['low'])
-        
-        else:  # resistance
-            for zone_list in self.knowledge['daily_zones'].values():
-                if 'resistance' in str(zone_list):
-                    for zone in zone_list:
-                        if zone['high'] > price:
-                            levels.append(zone['high'])
-            
-            for zone in self.knowledge['hourly_zones']['resistance']:
-                if zone['high'] > price:
-                    levels.append(zone['high'])
-        
-        # Return nearest
-        if levels:
-            if level_type == 'support':
-                return max(levels)
-            else:
-                return min(levels)
+            i = bisect_left(self.support_levels, price)
+            return self.support_levels[i - 1] if i > 0 else None
         
-        return None
+        i = bisect_right(self.resistance_levels, price)
+        return self.resistance_levels[i] if i < len(self.resistance_levels) else None
     
     def _make_recommendation(self, analysis: Dict) -> Dict:
         """Final recommendation based on all analysis"""
@@ -761,27 +836,37 @@ class IntelligentAnalyzer:
         
         return analysis
     
-    def check_time_quality(self) -> str:
-        """Check if current time is optimal for trading"""
+    def _track_recommendation(self, analysis: Dict) -> Dict:
+        """Hand ENTER setups to the position manager"""
         
-        now = datetime.now()
-        current_hour = now.hour
-        current_day = now.weekday()
+        rec = analysis['recommendation']
+        if rec['action'] != 'ENTER':
+            return analysis
         
-        # Check best times
-        for time_window in self.knowledge['time_patterns']['best_times']:
-            if time_window['start_hour'] <= current_hour < time_window['end_hour']:
-                return f"✅ {time_window['name']} - {time_window['quality']} trading time"
+        position_id = self.positions.open_from_setup(self.symbol, rec['setup'], strategy='intelligent')
+        if position_id is None:
+            analysis['recommendation'] = {
+                'action': 'IN POSITION',
+                'confidence': rec['confidence'],
+                'setup': rec['setup'],
+                'note': 'Setup already tracked - managing open position',
+            }
+        else:
+            rec['position_id'] = position_id
         
-        # Check avoid times
-        for time_window in self.knowledge['time_patterns']['avoid_times']:
-            if 'day' in time_window:
-                if current_day == time_window['day']:
-                    if time_window['start_hour'] <= current_hour < time_window['end_hour']:
-                        return f"⚠️ {time_window['name']} - {time_window['quality']} liquidity, avoid"
-            else:
-                if time_window['start_hour'] <= current_hour < time_window['end_hour']:
-                    return f"⚠️ {time_window['name']} - {time_window['quality']} liquidity, avoid"
+        return analysis
+    
+    def check_time_quality(self, ts: Optional[datetime] = None) -> str:
+        """Check if current time (or `ts`) is optimal for trading"""
+        
+        session = self.calendar.session(ts)
+        
+        if session['kind'] == 'closed':
+            return "❌ Market closed (weekend, daily halt or CME holiday)"
+        if session['kind'] == 'best':
+            return f"✅ {session['name']} - {session['quality']} trading time"
+        if session['kind'] == 'avoid':
+            return f"⚠️ {session['name']} - {session['quality']} liquidity, avoid"
         
         return "⚠️ ACCEPTABLE trading time"
 
@@ -830,17 +915,27 @@ def format_alert(analysis: Dict) -> str:
         setup = analysis['trade_setups'][0]
         alert.append(f"\n🎯 TRADE SETUP:")
         alert.append(f"   Direction: {setup['direction']}")
-        alert.append(f"   Entry: {setup['entry']}")
-        alert.append(f"   Stop Loss: {setup['stop_loss']}")
-        alert.append(f"   Target 1: {setup['target1']}")
-        alert.append(f"   Target 2: {setup['target2']}")
-        alert.append(f"   Risk/Reward: {setup['risk_reward']}")
+        alert.append(f"   Entry: ${setup['entry']:.2f}")
+        alert.append(f"   Stop Loss: ${setup['stop_loss']:.2f} (risk ${setup['risk']:.2f})")
+        alert.append(f"   Target 1: ${setup['target1']:.2f}")
+        alert.append(f"   Target 2: ${setup['target2']:.2f}")
+        alert.append(f"   Risk/Reward: 1:{setup['risk_reward']:.1f}")
+        if setup['atr'] is not None:
+            alert.append(f"   ATR: ${setup['atr']:.2f}")
         alert.append(f"   Reason: {setup['reason']}")
     
+    # Position updates
+    if analysis.get('position_events'):
+        from position_manager import format_position_event
+        alert.append(f"\n📒 POSITION UPDATES:")
+        for event in analysis['position_events']:
+            alert.append(f"   {format_position_event(event)}")
+    
     # Recommendation
     if analysis['recommendation']:
         rec = analysis['recommendation']
-        alert.append(f"\n{'✅' if rec['action'] == 'ENTER' else '⏳' if rec['action'] == 'WAIT' else '❌'} RECOMMENDATION: {rec['action']}")
+        emoji = {'ENTER': '✅', 'WAIT': '⏳', 'IN POSITION': '📌'}.get(rec['action'], '❌')
+        alert.append(f"\n{emoji} RECOMMENDATION: {rec['action']}")
         alert.append(f"   Confidence: {rec['confidence']}")
         alert.append(f"   Note: {rec['note']}")
     
@@ -854,8 +949,26 @@ def format_alert(analysis: Dict) -> str:
 
 if __name__ == "__main__":
     
-    # Initialize analyzer
-    analyzer = IntelligentAnalyzer()
+    import os
+    import shutil
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    
+    from position_manager import PositionManager
+    from volume_profile import VolumeProfile
+    from analysis_recorder import AnalysisRecorder, load_records, to_dataframe
+    
+    # Live volume profile (demo trades clustered around $4,205 and $4,245)
+    demo_dir = tempfile.mkdtemp(prefix='gold_agent_demo_')
+    profile = VolumeProfile(path=os.path.join(demo_dir, 'volume_profile.npz'))
+    rng = np.random.default_rng(1)
+    for centre in (4205, 4245, 4245):
+        profile.on_trades(np.round(rng.normal(centre, 4, 5000), 1), rng.integers(1, 10, 5000))
+    
+    # Initialize analyzer (with position tracking, live HVNs and an analysis log)
+    recorder = AnalysisRecorder(log_dir=os.path.join(demo_dir, 'analysis_log'))
+    analyzer = IntelligentAnalyzer(positions=PositionManager(), volume_profile=profile, recorder=recorder)
     
     # Check time quality
     time_quality = analyzer.check_time_quality()
@@ -881,6 +994,15 @@ if __name__ == "__main__":
     alert = format_alert(analysis)
     print(alert)
     
+    # Same price next tick: the setup is already tracked, so no new ENTER
+    print(format_alert(analyzer.analyze_price_level(current_price, mock_bars)))
+    
+    # Both analyses were logged for post-trade review
+    recorder.flush()
+    log = to_dataframe(load_records(recorder.log_dir), recorder.log_dir)
+    print(f"\n📝 Logged analyses: {len(log)} | actions: {list(log['action'])} | "
+          f"latency: {log['latency_us'].mean():.0f} µs")
+    
     print("\n🎯 This analyzer uses EVERYTHING we learned:")
     print("   ✅ Daily Tier 1/2/3 zones")
     print("   ✅ Hourly order blocks and swing points")
@@ -893,4 +1015,7 @@ if __name__ == "__main__":
     print("   ✅ Multi-timeframe confluence scoring")
     print("   ✅ Time-of-day optimization")
     print("   ✅ Macro context awareness")
+    print("   ✅ Position tracking (fills, targets, break-even, trailing stops)")
     print("\n🤖 Ready to integrate with real-time data feed!")
+    
+    shutil.rmtree(demo_dir)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+POSITION & RISK TRACKER
+Follows every recommended setup tick by tick after the ENTER alert
+
+Features:
+- Virtual positions held in flat numpy arrays (one book per symbol)
+- Every tick checked against ALL stops and targets in one vectorized comparison
+- Fill, target, break-even, trailing-stop and stop-out events
+- Duplicate setups are ignored while an equivalent position is live
+"""
+
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONFIG = {
+    'initial_capacity': 256,   # Slots per symbol book (grows by doubling)
+    'trail_step': 1.0,         # Move trailing stop only in steps of $1+
+    'dedupe_distance': 5.0,    # Same strategy/direction within $5 = same setup
+}
+
+# Position lifecycle
+FREE = 0      # Empty slot
+PENDING = 1   # Waiting for price to reach entry
+OPEN = 2      # Filled - stop and target 1 live
+RUNNER = 3    # Target 1 hit - stop at break-even or better, trailing
+
+LONG = 1
+SHORT = -1
+
+# =============================================================================
+# POSITION BOOK - ONE SYMBOL, ARRAY-BACKED
+# =============================================================================
+
+class PositionBook:
+    """
+    All virtual positions of one symbol, stored column-wise.
+
+    Each slot carries a `down` and an `up` trigger price. A position only
+    needs attention when price <= down or price >= up, so a tick is one
+    comparison over the whole book; the few hot slots are then handled
+    individually.
+    """
+
+    def __init__(self, symbol: str, capacity: int = None):
+        self.symbol = symbol
+        capacity = capacity or CONFIG['initial_capacity']
+
+        self.position_id = np.zeros(capacity, dtype=np.int64)
+        self.strategy = np.zeros(capacity, dtype=np.int32)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.direction = np.zeros(capacity, dtype=np.int8)
+        self.entry = np.zeros(capacity)
+        self.stop = np.zeros(capacity)
+        self.target1 = np.zeros(capacity)
+        self.target2 = np.zeros(capacity)
+        self.trail = np.zeros(capacity)
+        self.down = np.full(capacity, -np.inf)
+        self.up = np.full(capacity, np.inf)
+
+        self.size = 0          # High-water mark of used slots
+        self.free_slots = []   # Released slots below the high-water mark
+        self.now = None        # Timestamp of the tick being applied
+
+    # -------------------------------------------------------------------------
+    # Slot management
+    # -------------------------------------------------------------------------
+
+    def _columns(self) -> List[str]:
+        return ['position_id', 'strategy', 'state', 'direction', 'entry', 'stop',
+                'target1', 'target2', 'trail', 'down', 'up']
+
+    def _grow(self):
+        """Double the capacity of every column"""
+        for name in self._columns():
+            column = getattr(self, name)
+            fill = -np.inf if name == 'down' else np.inf if name == 'up' else 0
+            grown = np.full(len(column) * 2, fill, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def _allocate(self) -> int:
+        if self.free_slots:
+            return self.free_slots.pop()
+        if self.size == len(self.state):
+            self._grow()
+        self.size += 1
+        return self.size - 1
+
+    def _release(self, i: int):
+        self.state[i] = FREE
+        self.down[i] = -np.inf
+        self.up[i] = np.inf
+        self.free_slots.append(i)
+
+    def _set_triggers(self, i: int):
+        """Derive the down/up trigger prices from the slot's state"""
+        d = self.direction[i]
+        state = self.state[i]
+
+        if state == PENDING:
+            # LONG fills when price falls to entry, SHORT when it rises to it
+            self.down[i], self.up[i] = (self.entry[i], np.inf) if d == LONG else (-np.inf, self.entry[i])
+            return
+
+        if state == OPEN:
+            adverse, favorable = self.stop[i], self.target1[i]
+        else:  # RUNNER - next trail step or target 2, whichever comes first
+            trail_at = self.stop[i] + d * (self.trail[i] + CONFIG['trail_step'])
+            favorable = min(self.target2[i], trail_at) if d == LONG else max(self.target2[i], trail_at)
+            adverse = self.stop[i]
+
+        self.down[i], self.up[i] = (adverse, favorable) if d == LONG else (favorable, adverse)
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def add(self, position_id: int, strategy: int, direction: int, entry: float,
+            stop: float, target1: float, target2: float) -> int:
+        """Add a pending position and return its slot"""
+        i = self._allocate()
+        self.position_id[i] = position_id
+        self.strategy[i] = strategy
+        self.state[i] = PENDING
+        self.direction[i] = direction
+        self.entry[i] = entry
+        self.stop[i] = stop
+        self.target1[i] = target1
+        self.target2[i] = target2
+        self.trail[i] = abs(entry - stop)  # Trail by the initial risk (1R)
+        self._set_triggers(i)
+        return i
+
+    def live_slots(self) -> np.ndarray:
+        """Slots holding a pending or filled position"""
+        return np.flatnonzero(self.state[:self.size] != FREE)
+
+    def check(self, price: float) -> np.ndarray:
+        """Slots whose stop, target, entry or trail step was touched by `price`"""
+        n = self.size
+        return np.flatnonzero((self.down[:n] >= price) | (self.up[:n] <= price))
+
+    def on_tick(self, price: float, timestamp: datetime = None) -> List[Dict]:
+        """Apply one tick (stamped `timestamp`, default now) and return the resulting events"""
+
+        self.now = timestamp
+        events = []
+        for i in self.check(price):
+            events.extend(self._advance(int(i), price))
+        return events
+
+    def _event(self, i: int, event_type: str, price: float, **extra) -> Dict:
+        event = {
+            'type': event_type,
+            'position_id': int(self.position_id[i]),
+            'symbol': self.symbol,
+            'strategy': int(self.strategy[i]),
+            'direction': 'LONG' if self.direction[i] == LONG else 'SHORT',
+            'price': price,
+            'entry': float(self.entry[i]),
+            'stop': float(self.stop[i]),
+            'timestamp': self.now or datetime.now(),
+        }
+        event.update(extra)
+        return event
+
+    def _close(self, i: int, event_type: str, exit_price: float) -> Dict:
+        risk = self.trail[i]  # Initial risk
+        pnl = float(self.direction[i] * (exit_price - self.entry[i]))
+        event = self._event(i, event_type, exit_price, pnl=pnl,
+                            r_multiple=pnl / risk if risk else 0.0)
+        self._release(i)
+        return event
+
+    def _advance(self, i: int, price: float) -> List[Dict]:
+        """Move one hot slot through its lifecycle"""
+
+        d = self.direction[i]
+        state = self.state[i]
+
+        if state == PENDING:
+            self.state[i] = OPEN
+            self._set_triggers(i)
+            events = [self._event(i, 'FILL', float(self.entry[i]))]
+            # A tick that gaps through the entry may already be through the stop
+            if self.down[i] >= price or self.up[i] <= price:
+                events.extend(self._advance(i, price))
+            return events
+
+        # Adverse side first - a stop beats a target on the same tick
+        if d * (price - self.stop[i]) <= 0:
+            if state == RUNNER and self.stop[i] == self.entry[i]:
+                return [self._close(i, 'BREAK_EVEN_EXIT', float(self.stop[i]))]
+            event_type = 'TRAILING_STOP' if state == RUNNER else 'STOP'
+            return [self._close(i, event_type, float(self.stop[i]))]
+
+        if state == OPEN:
+            # Target 1 hit: lock in break-even and start trailing the runner
+            events = [self._event(i, 'TARGET1', float(self.target1[i]))]
+            self.state[i] = RUNNER
+            self.stop[i] = self.entry[i]
+            events.append(self._event(i, 'BREAK_EVEN', price))
+            if d * (price - self.target2[i]) >= 0:
+                events.append(self._close(i, 'TARGET2', float(self.target2[i])))
+                return events
+            events.extend(self._trail(i, price))
+            return events
+
+        # RUNNER
+        if d * (price - self.target2[i]) >= 0:
+            return [self._close(i, 'TARGET2', float(self.target2[i]))]
+
+        return self._trail(i, price)
+
+    def _trail(self, i: int, price: float) -> List[Dict]:
+        """Ratchet the runner's stop to `trail` behind price"""
+        d = self.direction[i]
+        old_stop = float(self.stop[i])
+        candidate = price - d * self.trail[i]
+        events = []
+        if d * (candidate - old_stop) >= CONFIG['trail_step']:
+            self.stop[i] = candidate
+            events.append(self._event(i, 'TRAIL', price, previous_stop=old_stop))
+        self._set_triggers(i)
+        return events
+
+# =============================================================================
+# POSITION MANAGER - ALL SYMBOLS AND STRATEGIES
+# =============================================================================
+
+class PositionManager:
+    """Tracks virtual positions for every symbol and strategy"""
+
+    def __init__(self):
+        self.books: Dict[str, PositionBook] = {}
+        self.strategies: Dict[str, int] = {}
+        self.next_id = 1
+
+    def _book(self, symbol: str) -> PositionBook:
+        if symbol not in self.books:
+            self.books[symbol] = PositionBook(symbol)
+        return self.books[symbol]
+
+    def _strategy_id(self, strategy: str) -> int:
+        return self.strategies.setdefault(strategy, len(self.strategies))
+
+    def open_position(self, symbol: str, direction: str, entry: float, stop: float,
+                      target1: float, target2: float, strategy: str = 'default') -> Optional[int]:
+        """
+        Start tracking a setup.
+        Returns the new position id, or None if an equivalent position is live.
+        """
+
+        d = LONG if direction == 'LONG' else SHORT
+        if self.find_open(symbol, direction, entry, strategy) is not None:
+            return None
+
+        position_id = self.next_id
+        self.next_id += 1
+        self._book(symbol).add(position_id, self._strategy_id(strategy), d,
+                               entry, stop, target1, target2)
+        return position_id
+
+    def open_from_setup(self, symbol: str, setup: Dict, strategy: str = 'default') -> Optional[int]:
+        """Start tracking a trade setup produced by IntelligentAnalyzer"""
+
+        return self.open_position(symbol, setup['direction'], setup['entry'], setup['stop_loss'],
+                                  setup['target1'], setup['target2'], strategy)
+
+    def find_open(self, symbol: str, direction: str, entry: float,
+                  strategy: str = 'default') -> Optional[int]:
+        """Id of a live position with the same strategy/direction near `entry`"""
+
+        book = self.books.get(symbol)
+        if book is None or strategy not in self.strategies:
+            return None
+
+        d = LONG if direction == 'LONG' else SHORT
+        n = book.size
+        match = np.flatnonzero(
+            (book.state[:n] != FREE)
+            & (book.direction[:n] == d)
+            & (book.strategy[:n] == self.strategies[strategy])
+            & (np.abs(book.entry[:n] - entry) <= CONFIG['dedupe_distance'])
+        )
+        return int(book.position_id[match[0]]) if len(match) else None
+
+    def on_tick(self, symbol: str, price: float, timestamp: datetime = None) -> List[Dict]:
+        """Check one tick against every position of `symbol` (events stamped `timestamp`)"""
+
+        book = self.books.get(symbol)
+        if book is None:
+            return []
+
+        events = book.on_tick(price, timestamp)
+        names = {v: k for k, v in self.strategies.items()} if events else {}
+        for event in events:
+            event['strategy'] = names[event['strategy']]
+        return events
+
+    def open_count(self, symbol: str = None) -> int:
+        """Number of pending or filled positions"""
+
+        books = [self.books[symbol]] if symbol in self.books else [] if symbol else self.books.values()
+        return sum(len(book.live_slots()) for book in books)
+
+# =============================================================================
+# EVENT FORMATTER
+# =============================================================================
+
+EVENT_EMOJI = {
+    'FILL': '📥',
+    'TARGET1': '🎯',
+    'BREAK_EVEN': '🛡️',
+    'TRAIL': '📈',
+    'TARGET2': '💰',
+    'STOP': '🛑',
+    'TRAILING_STOP': '🔒',
+    'BREAK_EVEN_EXIT': '➖',
+}
+
+def format_position_event(event: Dict) -> str:
+    """Format a position event into a one-line alert"""
+
+    line = (f"{EVENT_EMOJI.get(event['type'], '•')} {event['type']} "
+            f"#{event['position_id']} {event['symbol']} {event['direction']} "
+            f"@ ${event['price']:.2f} (entry ${event['entry']:.2f}, stop ${event['stop']:.2f})")
+    if 'pnl' in event:
+        line += f" | P&L {event['pnl']:+.2f} ({event['r_multiple']:+.1f}R)"
+    return line
+
+# =============================================================================
+# MAIN - THROUGHPUT CHECK
+# =============================================================================
+
+if __name__ == "__main__":
+
+    import time
+
+    manager = PositionManager()
+    rng = np.random.default_rng(7)
+
+    # 5,000 virtual positions spread over strategies around $4,200
+    for n in range(5000):
+        entry = 4200 + rng.uniform(-30, 30)
+        direction = 'LONG' if n % 2 else 'SHORT'
+        d = 1 if direction == 'LONG' else -1
+        manager.open_position('GC', direction, entry, entry - d * 15,
+                              entry + d * 30, entry + d * 60,
+                              strategy=f"strategy_{n % 50}")
+
+    prices = 4200 + np.cumsum(rng.normal(0, 0.5, 20000))
+    event_count = 0
+    start = time.perf_counter()
+    for price in prices:
+        event_count += len(manager.on_tick('GC', float(price)))
+    elapsed = time.perf_counter() - start
+
+    print(f"Positions opened: 5000 | still live: {manager.open_count('GC')}")
+    print(f"Ticks: {len(prices)} | events: {event_count}")
+    print(f"Average per tick: {elapsed / len(prices) * 1e6:.1f} µs")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+CME GOLD SESSION CALENDAR
+Precomputed, timezone-aware market-hours and session-quality lookup
+
+Features:
+- Minute-of-week table (10,080 entries) mapping ET wall-clock time to a session code
+- CME Globex weekly schedule: Sunday 18:00 -> Friday 17:00 ET, daily 17:00-18:00 halt
+- Holiday / early-close table keyed by CME trade date (warns outside the covered years)
+- O(1) answer for live ticks, one vectorized lookup for whole timestamp arrays
+- Time windows that wrap past midnight (e.g. Asian session 19 -> 2)
+"""
+
+import warnings
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+EXCHANGE_TZ = ZoneInfo('America/New_York')
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# A CME trade date starts at 18:00 ET the evening before
+TRADE_DATE_ROLL = timedelta(hours=24 - 18)
+
+# Globex metals holiday schedule (update yearly from cmegroup.com)
+# None = no session for that trade date, time = early close (ET)
+# Lookups in years not listed here warn - their holidays are unknown
+CME_HOLIDAYS = {
+    '2025-01-01': None,              # New Year's Day
+    '2025-01-09': time(13, 30),      # National Day of Mourning
+    '2025-01-20': time(13, 30),      # Martin Luther King Jr. Day
+    '2025-02-17': time(13, 30),      # Presidents' Day
+    '2025-04-18': None,              # Good Friday
+    '2025-05-26': time(13, 30),      # Memorial Day
+    '2025-06-19': time(13, 30),      # Juneteenth
+    '2025-07-04': time(13, 30),      # Independence Day
+    '2025-09-01': time(13, 30),      # Labor Day
+    '2025-11-27': time(13, 30),      # Thanksgiving
+    '2025-11-28': time(13, 45),      # Day after Thanksgiving
+    '2025-12-24': time(13, 45),      # Christmas Eve
+    '2025-12-25': None,              # Christmas
+    '2026-01-01': None,              # New Year's Day
+    '2026-01-19': time(13, 30),      # Martin Luther King Jr. Day
+    '2026-02-16': time(13, 30),      # Presidents' Day
+    '2026-04-03': None,              # Good Friday
+    '2026-05-25': time(13, 30),      # Memorial Day
+    '2026-06-19': time(13, 30),      # Juneteenth
+    '2026-07-03': time(13, 30),      # Independence Day (observed)
+    '2026-09-07': time(13, 30),      # Labor Day
+    '2026-11-26': time(13, 30),      # Thanksgiving
+    '2026-11-27': time(13, 45),      # Day after Thanksgiving
+    '2026-12-24': time(13, 45),      # Christmas Eve
+    '2026-12-25': None,              # Christmas
+}
+
+# Fixed session codes; time windows get codes 2, 3, ... in priority order
+CLOSED = 0
+ACCEPTABLE = 1
+
+# =============================================================================
+# SESSION CALENDAR
+# =============================================================================
+
+class SessionCalendar:
+    """Minute-of-week session table plus CME holiday overrides"""
+
+    def __init__(self, time_patterns: Dict = None, holidays: Dict = None):
+        """
+        time_patterns: best/avoid windows, e.g. KNOWLEDGE_BASE['time_patterns']
+        (None = open/closed only). holidays: defaults to CME_HOLIDAYS.
+        """
+        time_patterns = time_patterns or {}
+        holidays = CME_HOLIDAYS if holidays is None else holidays
+
+        # One entry per session code
+        self.sessions: List[Dict] = [
+            {'name': 'Market Closed', 'quality': 'CLOSED', 'kind': 'closed'},
+            {'name': 'ACCEPTABLE', 'quality': 'ACCEPTABLE', 'kind': 'open'},
+        ]
+        windows = []
+        for kind, key in (('best', 'best_times'), ('avoid', 'avoid_times')):
+            for window in time_patterns.get(key, []):
+                windows.append((len(self.sessions), window))
+                self.sessions.append({'name': window['name'], 'quality': window['quality'], 'kind': kind})
+
+        self.table = self._build_table(windows)
+
+        self.closed_dates = set()
+        self.early_closes = {}
+        for day, close in holidays.items():
+            day = date.fromisoformat(day) if isinstance(day, str) else day
+            if close is None:
+                self.closed_dates.add(day)
+            else:
+                self.early_closes[day] = close.hour * 60 + close.minute
+
+        self.holiday_years = {day.year for day in self.closed_dates | set(self.early_closes)}
+        self._warned_years = set()
+
+    @staticmethod
+    def _build_table(windows: List) -> bytes:
+        """Session code for every minute of the week (Monday 00:00 ET = 0)"""
+
+        hourly = []
+        for hour_of_week in range(7 * 24):
+            day, hour = divmod(hour_of_week, 24)
+            code = ACCEPTABLE if _globex_open(day, hour) else CLOSED
+            if code != CLOSED:
+                for window_code, window in windows:
+                    if _in_window(window, day, hour):
+                        code = window_code
+                        break
+            hourly.append(code)
+
+        # All schedule and window boundaries fall on the hour
+        return bytes(code for code in hourly for _ in range(60))
+
+    # -------------------------------------------------------------------------
+    # Live lookups - O(1)
+    # -------------------------------------------------------------------------
+
+    def session_at(self, ts: Optional[datetime] = None) -> int:
+        """Session code at `ts` (naive = ET, default = now)"""
+
+        local = to_exchange_time(ts)
+        code = self.table[local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute]
+        if code == CLOSED or not (self.closed_dates or self.early_closes):
+            return code
+
+        trade_date = (local + TRADE_DATE_ROLL).date()
+        if trade_date.year not in self.holiday_years:
+            self._warn_uncovered([trade_date.year])
+        if trade_date in self.closed_dates:
+            return CLOSED
+        close_minute = self.early_closes.get(trade_date)
+        if close_minute is not None and local.date() == trade_date \
+                and local.hour * 60 + local.minute >= close_minute:
+            return CLOSED
+        return code
+
+    def session(self, ts: Optional[datetime] = None) -> Dict:
+        """Session record ({'name', 'quality', 'kind'}) at `ts`"""
+        return self.sessions[self.session_at(ts)]
+
+    def is_open(self, ts: Optional[datetime] = None) -> bool:
+        """True while Globex is trading"""
+        return self.session_at(ts) != CLOSED
+
+    def is_best_time(self, ts: Optional[datetime] = None) -> bool:
+        """True inside one of the best-time windows"""
+        return self.session(ts)['kind'] == 'best'
+
+    # -------------------------------------------------------------------------
+    # Vectorized lookups - whole timestamp arrays
+    # -------------------------------------------------------------------------
+
+    def session_codes(self, timestamps):
+        """
+        Session codes (uint8 array) for a whole array of timestamps.
+        Accepts anything pandas.DatetimeIndex accepts; naive values are ET.
+        """
+
+        import numpy as np
+        import pandas as pd
+
+        index = pd.DatetimeIndex(timestamps)
+        if index.tz is not None:  # Naive values already are ET wall-clock time
+            index = index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+
+        minute_of_day = index.hour.to_numpy() * 60 + index.minute.to_numpy()
+        minute_of_week = index.dayofweek.to_numpy() * MINUTES_PER_DAY + minute_of_day
+        codes = np.frombuffer(self.table, dtype=np.uint8)[minute_of_week]
+
+        if self.closed_dates or self.early_closes:
+            local_dates = index.normalize()
+            trade_dates = (index + TRADE_DATE_ROLL).normalize()
+            self._warn_uncovered(set(np.unique(trade_dates.year).tolist()) - self.holiday_years)
+            closed = trade_dates.isin(pd.DatetimeIndex(sorted(self.closed_dates)))
+            for day, close_minute in self.early_closes.items():
+                day = pd.Timestamp(day)
+                closed |= (trade_dates == day) & (local_dates == day) & (minute_of_day >= close_minute)
+            codes[closed] = CLOSED
+
+        return codes
+
+    def _warn_uncovered(self, years):
+        """Warn once per year that has no holiday data"""
+        for year in sorted(set(years) - self._warned_years):
+            self._warned_years.add(year)
+            covered = f"{min(self.holiday_years)}-{max(self.holiday_years)}"
+            warnings.warn(f"CME holiday table covers {covered} only - holidays and early closes "
+                          f"in {year} are not applied (update CME_HOLIDAYS)", stacklevel=3)
+
+    def session_labels(self, timestamps):
+        """Session names for a whole array of timestamps"""
+
+        import numpy as np
+
+        names = np.array([session['name'] for session in self.sessions])
+        return names[self.session_codes(timestamps)]
+
+# =============================================================================
+# HELPERS
+# =============================================================================
+
+def _globex_open(day: int, hour: int) -> bool:
+    """Weekly Globex schedule for ET weekday (Mon=0) and hour"""
+
+    if day == 5:                 # Saturday
+        return False
+    if day == 6:                 # Sunday - opens 18:00
+        return hour >= 18
+    if day == 4:                 # Friday - closes 17:00
+        return hour < 17
+    return hour != 17            # Daily 17:00-18:00 maintenance halt
+
+def _in_window(window: Dict, day: int, hour: int) -> bool:
+    """Hour-window match, including windows that wrap past midnight"""
+
+    start, end = window['start_hour'], window['end_hour']
+    if start < end:
+        in_hours = start <= hour < end
+    else:
+        in_hours = hour >= start or hour < end
+    return in_hours and window.get('day', day) == day
+
+def to_exchange_time(ts: Optional[datetime]) -> datetime:
+    """Convert to naive ET wall-clock time"""
+
+    if ts is None:
+        return datetime.now(EXCHANGE_TZ).replace(tzinfo=None)
+    if ts.tzinfo is None:
+        return ts
+    return ts.astimezone(EXCHANGE_TZ).replace(tzinfo=None)
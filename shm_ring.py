@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+SHARED-MEMORY MARKET STREAM
+One producer publishes ticks, bars and analysis results; any number of
+processes read them without copies or serialization
+
+Features:
+- Single-producer / multi-consumer ring buffer on multiprocessing.shared_memory
+- Fixed-size numpy records, read in place as zero-copy views
+- Every consumer keeps its own cursor
+- Per-record sequence numbers detect slow readers that were lapped
+- Feed publisher: one vendor API call per instrument, shared by every consumer
+"""
+
+import os
+import time
+import numpy as np
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONFIG = {
+    'ring_name': 'gold_stream',
+    'capacity': 65536,          # Records in the ring (power of two not required)
+    'slow_reader_pct': 0.5,     # Warn when a reader lags by half the ring
+    'publish_interval': 1.0,    # Seconds between feed polls
+}
+
+# Record kinds
+TICK = 1
+BAR = 2
+ANALYSIS = 3
+
+ACTIONS = ['', 'ENTER', 'WAIT', 'NO TRADE', 'IN POSITION']
+
+RECORD_DTYPE = np.dtype([
+    ('seq', '<u8'),          # 1-based publish sequence, written last (0 = being written)
+    ('kind', 'u1'),
+    ('action', 'u1'),        # ANALYSIS: index into ACTIONS
+    ('symbol', 'S6'),
+    ('timestamp', '<f8'),    # Unix seconds
+    ('price', '<f8'),        # TICK: last | BAR: close | ANALYSIS: analyzed price
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('volume', '<f8'),
+    ('score', '<f4'),        # ANALYSIS: confluence score
+    ('latency_us', '<f4'),   # ANALYSIS: analyze_price_level() wall time
+], align=True)
+
+_FIELDS = {name: i for i, name in enumerate(RECORD_DTYPE.names)}
+
+# Header: magic, version, capacity, record size, published count, owner
+HEADER_DTYPE = np.dtype([
+    ('magic', '<u4'),
+    ('version', '<u4'),
+    ('capacity', '<u8'),
+    ('record_size', '<u8'),
+    ('write_seq', '<u8'),
+    ('producer_pid', '<u8'),
+])
+HEADER_SIZE = 64
+MAGIC = 0x474F4C44  # 'GOLD'
+
+class RingInUseError(RuntimeError):
+    """Another live producer already owns the ring"""
+
+class SlowConsumerError(RuntimeError):
+    """The producer overwrote records this consumer had not read yet"""
+
+    def __init__(self, lost: int):
+        super().__init__(f"Consumer lapped by producer - {lost} records lost")
+        self.lost = lost
+
+# =============================================================================
+# SHARED RING LAYOUT
+# =============================================================================
+
+class _Ring:
+    """Numpy views over a shared memory block"""
+
+    def __init__(self, shm: shared_memory.SharedMemory):
+        self.shm = shm
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        capacity = int(self.header['capacity'])
+        self.records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=shm.buf, offset=HEADER_SIZE)
+        self.capacity = capacity
+
+    @property
+    def write_seq(self) -> int:
+        return int(self.header['write_seq'])
+
+    @property
+    def producer_alive(self) -> bool:
+        """True while the process that created the ring is running"""
+        return int(self.header['magic']) == MAGIC and _pid_alive(int(self.header['producer_pid']))
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        del self.header, self.records
+        self.shm.close()
+
+# =============================================================================
+# PRODUCER
+# =============================================================================
+
+class RingProducer:
+    """Creates the ring and publishes records into it (one per process)"""
+
+    def __init__(self, name: str = None, capacity: int = None):
+        name = name or CONFIG['ring_name']
+        capacity = capacity or CONFIG['capacity']
+
+        size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Only a ring whose producer is gone may be taken over
+            pid = _live_owner(name)
+            if pid:
+                raise RingInUseError(f"Ring '{name}' is owned by running producer pid {pid}")
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header['capacity'] = capacity
+        header['record_size'] = RECORD_DTYPE.itemsize
+        header['write_seq'] = 0
+        header['producer_pid'] = os.getpid()
+        header['version'] = 2
+        header['magic'] = MAGIC  # Last: consumers wait for it
+        del header
+
+        self.name = name
+        self.ring = _Ring(shm)
+        self._header = self.ring.header
+        self._seq_column = self.ring.records['seq']
+        self.seq = 0
+
+    def publish(self, kind: int, symbol: str, price: float, timestamp: float = None, **fields):
+        """Publish one record; `fields` are any other RECORD_DTYPE columns"""
+
+        row = [0] * len(_FIELDS)
+        row[_FIELDS['kind']] = kind
+        row[_FIELDS['symbol']] = symbol.encode()[:6]
+        row[_FIELDS['price']] = price
+        row[_FIELDS['timestamp']] = time.time() if timestamp is None else timestamp
+        for name, value in fields.items():
+            row[_FIELDS[name]] = value
+
+        # Seqlock: the record is written with seq 0 (in progress), then stamped
+        slot = self.seq % self.ring.capacity
+        self.ring.records[slot] = tuple(row)
+        self.seq += 1
+        self._seq_column[slot] = self.seq
+        self._header['write_seq'] = self.seq
+
+    def publish_tick(self, symbol: str, quote: Dict):
+        """Publish a DataFeed.get_current_price() quote"""
+        self.publish(TICK, symbol, quote['price'], _unix_time(quote.get('timestamp')),
+                     bid=quote.get('bid', 0), ask=quote.get('ask', 0), high=quote.get('high', 0),
+                     low=quote.get('low', 0), volume=quote.get('volume', 0))
+
+    def publish_bar(self, symbol: str, bar: Dict):
+        """Publish one OHLCV bar"""
+        self.publish(BAR, symbol, bar['close'], _unix_time(bar.get('timestamp')),
+                     open=bar['open'], high=bar['high'], low=bar['low'], volume=bar['volume'])
+
+    def publish_analysis(self, symbol: str, analysis: Dict):
+        """Publish the headline numbers of an IntelligentAnalyzer result"""
+        rec = analysis.get('recommendation') or {}
+        action = ACTIONS.index(rec['action']) if rec.get('action') in ACTIONS else 0
+        self.publish(ANALYSIS, symbol, analysis['price'], _unix_time(analysis.get('timestamp')),
+                     score=analysis['confluence_score'], action=action,
+                     latency_us=analysis.get('latency_us', 0))
+
+    def close(self, unlink: bool = True):
+        """Detach; by default also remove the ring"""
+        shm = self.ring.shm
+        del self._header, self._seq_column
+        self.ring.close()
+        if unlink:
+            shm.unlink()
+
+# =============================================================================
+# CONSUMER
+# =============================================================================
+
+class RingConsumer:
+    """Attaches to a ring by name and reads it with its own cursor"""
+
+    def __init__(self, name: str = None, from_start: bool = False, timeout: float = 10.0):
+        name = name or CONFIG['ring_name']
+        self.ring = _Ring(_attach(name, timeout))
+
+        deadline = time.time() + timeout
+        while int(self.ring.header['magic']) != MAGIC:
+            if time.time() > deadline:
+                raise TimeoutError(f"Ring '{name}' was never initialized")
+            time.sleep(0.001)
+
+        head = self.ring.write_seq
+        # Cursor = sequence number of the next record to read (0-based)
+        self.cursor = max(0, head - self.ring.capacity) if from_start else head
+        self.lost = 0
+
+    @property
+    def lag(self) -> int:
+        """Records published but not read yet"""
+        return self.ring.write_seq - self.cursor
+
+    @property
+    def producer_alive(self) -> bool:
+        """False once the producer has exited - no more records will arrive"""
+        return self.ring.producer_alive
+
+    @property
+    def is_slow(self) -> bool:
+        """True when this reader is falling dangerously far behind"""
+        return self.lag > self.ring.capacity * CONFIG['slow_reader_pct']
+
+    def read(self, max_records: int = None) -> np.ndarray:
+        """
+        Next unread records as a zero-copy view into shared memory (may be empty).
+        A view never wraps the ring end - call again for the rest.
+        Raises SlowConsumerError (and skips ahead) if the reader was lapped.
+        """
+
+        head = self.ring.write_seq
+        capacity = self.ring.capacity
+        if head - self.cursor > capacity:
+            lost = head - capacity - self.cursor
+            self.cursor = head - capacity
+            self.lost += lost
+            raise SlowConsumerError(lost)
+
+        count = head - self.cursor
+        if max_records is not None:
+            count = min(count, max_records)
+        start = self.cursor % capacity
+        count = min(count, capacity - start)
+
+        view = self.ring.records[start:start + count]
+        self.cursor += count
+        return view
+
+    def verify(self, view: np.ndarray) -> bool:
+        """
+        True if `view` was not overwritten while it was being used.
+        The oldest record in a view is always the first to be overwritten.
+        """
+        if len(view) == 0:
+            return True
+        expected_first = self.cursor - len(view) + 1
+        return int(view['seq'][0]) == expected_first and int(view['seq'][-1]) == self.cursor
+
+    def close(self):
+        self.ring.close()
+
+def _attach(name: str, timeout: float) -> shared_memory.SharedMemory:
+    """Open an existing ring without letting this process's tracker unlink it"""
+
+    deadline = time.time() + timeout
+    while True:
+        try:
+            try:
+                return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+            except TypeError:
+                pass
+            # Older Pythons always register the segment, and a consumer exiting
+            # would then destroy the producer's ring - skip the registration
+            from multiprocessing import resource_tracker
+            register = resource_tracker.register
+            resource_tracker.register = lambda *args: None
+            try:
+                return shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        except FileNotFoundError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.05)
+
+def _live_owner(name: str) -> int:
+    """Pid of the running producer of an existing ring (0 = stale or unfinished)"""
+
+    shm = _attach(name, timeout=0)
+    try:
+        if shm.size < HEADER_DTYPE.itemsize:
+            return 0
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        pid = int(header['producer_pid']) if int(header['magic']) == MAGIC else 0
+        del header
+        return pid if _pid_alive(pid) else 0
+    finally:
+        shm.close()
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+def _unix_time(ts) -> float:
+    if ts is None:
+        return time.time()
+    if isinstance(ts, datetime):
+        return ts.timestamp()
+    if isinstance(ts, np.datetime64):
+        return ts.astype('datetime64[us]').astype(np.int64) / 1e6
+    return float(ts)
+
+# =============================================================================
+# FEED PUBLISHER - ONE VENDOR CALL PER INSTRUMENT
+# =============================================================================
+
+def run_feed_publisher(feed, producer: RingProducer, symbol: str = 'GC', interval: float = None,
+                       analyzer=None):
+    """
+    Poll `feed` (a DataFeed) once per interval and publish the quote, the
+    latest bar and - if an IntelligentAnalyzer is given - its analysis.
+    """
+
+    interval = interval or CONFIG['publish_interval']
+    last_bar_time = None
+
+    while True:
+        quote = feed.get_current_price()
+        if quote:
+            producer.publish_tick(symbol, quote)
+
+        bars = feed.get_recent_bars(count=20)
+        if bars is not None and len(bars['close']):
+            bar = {col: np.asarray(bars[col])[-1] for col in ('timestamp', 'open', 'high', 'low', 'close', 'volume')}
+            if bar['timestamp'] != last_bar_time:
+                producer.publish_bar(symbol, bar)
+                last_bar_time = bar['timestamp']
+
+            if analyzer is not None and quote:
+                analysis = analyzer.analyze_price_level(quote['price'], bars, quote.get('timestamp'))
+                producer.publish_analysis(symbol, analysis)
+
+        time.sleep(interval)
+
+# =============================================================================
+# MAIN - FAN-OUT DEMO
+# =============================================================================
+
+def _demo_consumer(name: str, label: str, delay: float):
+    consumer = RingConsumer(name, from_start=True)
+    received = 0
+    try:
+        while received < 200000:
+            try:
+                view = consumer.read(4096)
+            except SlowConsumerError as e:
+                print(f"[{label}] {e}")
+                continue
+            if len(view) == 0:
+                time.sleep(0.0005)
+                continue
+            last_price = float(view['price'][-1])  # Read in place
+            if not consumer.verify(view):
+                print(f"[{label}] view overwritten while reading")
+            received += len(view)
+            time.sleep(delay)
+        print(f"[{label}] received {received} records, lost {consumer.lost}, last ${last_price:.2f}")
+    finally:
+        consumer.close()
+
+if __name__ == "__main__":
+
+    import multiprocessing as mp
+
+    name = 'gold_stream_demo'
+    producer = RingProducer(name, capacity=65536)
+
+    readers = [
+        mp.Process(target=_demo_consumer, args=(name, 'rule agent', 0)),
+        mp.Process(target=_demo_consumer, args=(name, 'dashboard', 0)),
+        mp.Process(target=_demo_consumer, args=(name, 'slow recorder', 0.02)),
+    ]
+    for reader in readers:
+        reader.start()
+    time.sleep(0.5)  # Let the readers attach
+
+    start = time.perf_counter()
+    for i in range(200000):
+        producer.publish(TICK, 'GC', 4200 + (i % 500) * 0.1, bid=4199.9, ask=4200.1, volume=1)
+    elapsed = time.perf_counter() - start
+    print(f"Published 200000 ticks: {elapsed / 200000 * 1e6:.2f} µs per record")
+
+    for reader in readers:
+        reader.join(timeout=30)
+        if reader.is_alive():
+            reader.terminate()
+    producer.close()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+LIVE VOLUME PROFILE
+Volume-at-price built tick by tick instead of hand-entered HVNs
+
+Features:
+- Fixed-size numpy histogram, one bin per tick ($0.10 for GC)
+- Session, week and composite windows updated incrementally from trades
+- POC, value area and HVN/LVN lists derived on demand in O(bins)
+- Saved to disk so a restarted agent keeps its profile
+"""
+
+import os
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from session_calendar import TRADE_DATE_ROLL, to_exchange_time
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+
+CONFIG = {
+    'tick_size': 0.10,          # GC minimum price increment
+    'price_low': 2000.0,        # Histogram covers $2,000 - $6,000
+    'price_high': 6000.0,
+    'row_ticks': 10,            # Aggregate to $1 rows for POC/VA/HVN/LVN
+    'value_area_pct': 0.70,     # Classic 70% value area
+    'smoothing_rows': 5,        # Moving-average width before finding nodes
+    'hvn_threshold': 1.5,       # Node volume >= 1.5x average occupied row
+    'lvn_threshold': 0.5,       # Node volume <= 0.5x average occupied row
+    'profile_path': './volume_profile.npz',
+}
+
+WINDOWS = ('session', 'week', 'composite')
+
+# =============================================================================
+# VOLUME HISTOGRAM - ONE WINDOW
+# =============================================================================
+
+class VolumeHistogram:
+    """Volume per price tick in a fixed-size array"""
+
+    def __init__(self, price_low: float = None, price_high: float = None, tick_size: float = None):
+        self.price_low = CONFIG['price_low'] if price_low is None else price_low
+        self.price_high = CONFIG['price_high'] if price_high is None else price_high
+        self.tick_size = tick_size or CONFIG['tick_size']
+
+        bins = int(round((self.price_high - self.price_low) / self.tick_size))
+        self.volume = np.zeros(bins)
+        self.total = 0.0
+        self.dropped = 0.0  # Volume traded outside the histogram range
+
+    def _bin(self, price: float) -> int:
+        return int(round((price - self.price_low) / self.tick_size))
+
+    def add(self, price: float, size: float):
+        """Add one trade"""
+        i = self._bin(price)
+        if 0 <= i < len(self.volume):
+            self.volume[i] += size
+            self.total += size
+        else:
+            self.dropped += size
+
+    def add_many(self, prices: np.ndarray, sizes: np.ndarray):
+        """Add a batch of trades"""
+        bins = np.rint((np.asarray(prices, dtype=float) - self.price_low) / self.tick_size).astype(np.int64)
+        sizes = np.asarray(sizes, dtype=float)
+        inside = (bins >= 0) & (bins < len(self.volume))
+        self.volume += np.bincount(bins[inside], weights=sizes[inside], minlength=len(self.volume))
+        self.total += float(sizes[inside].sum())
+        self.dropped += float(sizes[~inside].sum())
+
+    def reset(self):
+        self.volume[:] = 0
+        self.total = 0.0
+        self.dropped = 0.0
+
+    # -------------------------------------------------------------------------
+    # Derived levels - all O(bins)
+    # -------------------------------------------------------------------------
+
+    def rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(row start prices, row volumes) aggregated to CONFIG['row_ticks']"""
+        row_ticks = CONFIG['row_ticks']
+        usable = len(self.volume) - len(self.volume) % row_ticks
+        volumes = self.volume[:usable].reshape(-1, row_ticks).sum(axis=1)
+        prices = np.round(self.price_low + np.arange(len(volumes)) * row_ticks * self.tick_size, 2)
+        return prices, volumes
+
+    def poc(self) -> Optional[float]:
+        """Point of control - price of the highest-volume row"""
+        if self.total == 0:
+            return None
+        prices, volumes = self.rows()
+        return float(prices[np.argmax(volumes)])
+
+    def value_area(self, pct: float = None) -> Optional[Tuple[float, float]]:
+        """(VAL, VAH): expand from the POC toward the heavier side until `pct` of volume"""
+
+        if self.total == 0:
+            return None
+        pct = pct or CONFIG['value_area_pct']
+        prices, volumes = self.rows()
+
+        occupied = np.flatnonzero(volumes)
+        first, last = occupied[0], occupied[-1]
+        lo = hi = int(np.argmax(volumes))
+        covered = volumes[lo]
+        target = volumes.sum() * pct
+
+        while covered < target and (lo > first or hi < last):
+            below = volumes[lo - 1] if lo > first else -1.0
+            above = volumes[hi + 1] if hi < last else -1.0
+            if above >= below:
+                hi += 1
+                covered += above
+            else:
+                lo -= 1
+                covered += below
+
+        row_size = CONFIG['row_ticks'] * self.tick_size
+        return float(prices[lo]), float(round(prices[hi] + row_size, 2))
+
+    def nodes(self) -> Dict[str, List[Dict]]:
+        """High and low volume nodes (local peaks / troughs of the smoothed profile)"""
+
+        if self.total == 0:
+            return {'hvn': [], 'lvn': []}
+
+        prices, volumes = self.rows()
+        occupied = np.flatnonzero(volumes)
+        first, last = occupied[0], occupied[-1] + 1
+        prices, volumes = prices[first:last], volumes[first:last]
+
+        width = CONFIG['smoothing_rows']
+        smooth = np.convolve(volumes, np.ones(width) / width, mode='same')
+        average = smooth.mean()
+
+        # Interior local extremes (plateaus count once, on their left edge)
+        left, mid, right = smooth[:-2], smooth[1:-1], smooth[2:]
+        peaks = np.flatnonzero((mid > left) & (mid >= right) & (mid >= average * CONFIG['hvn_threshold'])) + 1
+        troughs = np.flatnonzero((mid < left) & (mid <= right) & (mid <= average * CONFIG['lvn_threshold'])) + 1
+
+        poc_volume = smooth.max()
+        hvn = [{
+            'price': float(prices[i]),
+            'volume': float(volumes[i]),
+            'significance': 'EXTREME' if smooth[i] == poc_volume else
+                            'VERY_HIGH' if smooth[i] >= poc_volume * 0.5 else 'HIGH',
+        } for i in peaks]
+        lvn = [{'price': float(prices[i]), 'volume': float(volumes[i])} for i in troughs]
+        return {'hvn': hvn, 'lvn': lvn}
+
+# =============================================================================
+# VOLUME PROFILE ENGINE - SESSION / WEEK / COMPOSITE
+# =============================================================================
+
+class VolumeProfile:
+    """Session, week and composite histograms fed from the trade stream"""
+
+    def __init__(self, path: str = None):
+        self.path = path or CONFIG['profile_path']
+        self.windows = {name: VolumeHistogram() for name in WINDOWS}
+        self.session_key = None  # CME trade date of the current session
+        self.week_key = None     # (ISO year, ISO week) of that trade date
+        self._cache = {}
+
+        if os.path.exists(self.path):
+            self.load()
+
+    @staticmethod
+    def _keys(ts: Optional[datetime]) -> Tuple[str, Tuple[int, int]]:
+        trade_date = (to_exchange_time(ts) + TRADE_DATE_ROLL).date()
+        return trade_date.isoformat(), tuple(trade_date.isocalendar()[:2])
+
+    def _roll(self, ts: Optional[datetime]):
+        """Reset the session/week histograms when a new one starts"""
+        session_key, week_key = self._keys(ts)
+        if session_key != self.session_key:
+            if self.session_key is not None:
+                self.windows['session'].reset()
+            if week_key != self.week_key and self.week_key is not None:
+                self.windows['week'].reset()
+            self.session_key, self.week_key = session_key, week_key
+
+    def on_trade(self, price: float, size: float, ts: Optional[datetime] = None):
+        """Add one trade to every window"""
+        self._roll(ts)
+        for histogram in self.windows.values():
+            histogram.add(price, size)
+        self._cache.clear()
+
+    def on_trades(self, prices: np.ndarray, sizes: np.ndarray, ts: Optional[datetime] = None):
+        """Add a batch of trades from the same session (e.g. one bar)"""
+        self._roll(ts)
+        for histogram in self.windows.values():
+            histogram.add_many(prices, sizes)
+        self._cache.clear()
+
+    # -------------------------------------------------------------------------
+    # Derived levels (cached until the next trade)
+    # -------------------------------------------------------------------------
+
+    def summary(self, window: str = 'composite') -> Dict:
+        """POC, value area and node lists of one window"""
+
+        if window not in self._cache:
+            histogram = self.windows[window]
+            value_area = histogram.value_area()
+            nodes = histogram.nodes()
+            self._cache[window] = {
+                'window': window,
+                'poc': histogram.poc(),
+                'val': value_area[0] if value_area else None,
+                'vah': value_area[1] if value_area else None,
+                'hvn': nodes['hvn'],
+                'lvn': nodes['lvn'],
+                'total_volume': histogram.total,
+            }
+        return self._cache[window]
+
+    def high_volume_nodes(self, window: str = 'composite') -> List[Dict]:
+        """HVNs in the same shape as KNOWLEDGE_BASE['volume_profile']"""
+
+        label = window.capitalize()
+        return [
+            dict(node, note=f"{label} {'POC' if node['significance'] == 'EXTREME' else 'HVN'}")
+            for node in self.summary(window)['hvn']
+        ]
+
+    # -------------------------------------------------------------------------
+    # Persistence
+    # -------------------------------------------------------------------------
+
+    def save(self, path: str = None):
+        """Write all windows to a compressed .npz file (atomically)"""
+
+        path = path or self.path
+        composite = self.windows['composite']
+        arrays = {f"{name}_volume": h.volume for name, h in self.windows.items()}
+        arrays.update({f"{name}_totals": np.array([h.total, h.dropped]) for name, h in self.windows.items()})
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            grid=np.array([composite.price_low, composite.price_high, composite.tick_size]),
+            session_key=np.array(self.session_key or ''),
+            week_key=np.array(self.week_key or (0, 0)),
+            **arrays,
+        )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = None):
+        """Restore windows saved by save(); a different price grid is ignored"""
+
+        path = path or self.path
+        with np.load(path) as data:
+            composite = self.windows['composite']
+            grid = (composite.price_low, composite.price_high, composite.tick_size)
+            if not np.allclose(data['grid'], grid):
+                print(f"Volume profile {path} uses a different price grid - starting fresh")
+                return
+
+            for name, histogram in self.windows.items():
+                histogram.volume[:] = data[f"{name}_volume"]
+                histogram.total, histogram.dropped = (float(v) for v in data[f"{name}_totals"])
+            self.session_key = str(data['session_key']) or None
+            week_key = tuple(int(v) for v in data['week_key'])
+            self.week_key = week_key if week_key != (0, 0) else None
+        self._cache.clear()
+
+# =============================================================================
+# MAIN - DEMO
+# =============================================================================
+
+if __name__ == "__main__":
+
+    import shutil
+    import tempfile
+    import time
+
+    demo_dir = tempfile.mkdtemp(prefix='volume_profile_')
+    profile = VolumeProfile(path=os.path.join(demo_dir, 'volume_profile.npz'))
+    rng = np.random.default_rng(3)
+
+    # Two days of synthetic trades clustered around $4,205 and $4,245
+    start = datetime(2025, 12, 2, 9, 0)
+    for minute in range(2 * 24 * 60):
+        centre = 4205 if rng.random() < 0.6 else 4245
+        prices = np.round(rng.normal(centre, 6, 50), 1)
+        profile.on_trades(prices, rng.integers(1, 10, 50), ts=start + timedelta(minutes=minute))
+
+    t = time.perf_counter()
+    summary = profile.summary('composite')
+    elapsed = (time.perf_counter() - t) * 1000
+
+    print(f"Composite POC: ${summary['poc']:.2f} | VA: ${summary['val']:.2f} - ${summary['vah']:.2f}")
+    print(f"HVNs: {[n['price'] for n in summary['hvn']]}")
+    print(f"LVNs: {[n['price'] for n in summary['lvn']]}")
+    print(f"Session POC: ${profile.summary('session')['poc']:.2f} (trade date {profile.session_key})")
+    print(f"Derived levels in {elapsed:.2f} ms")
+
+    profile.save()
+    print(f"Saved and reloaded: composite POC ${VolumeProfile(profile.path).summary()['poc']:.2f}")
+    shutil.rmtree(demo_dir)